@@ -1,180 +1,580 @@
-from bdb import Bdb
+import ast
+from collections import defaultdict
+import functools
 import inspect
-from itertools import imap, dropwhile, permutations
-import pydoc
-import re
+from itertools import dropwhile, izip, permutations
+from StringIO import StringIO
 import sys
+import textwrap
+import time
+import tokenize
 import traceback
-import timeit
-
-import wrapt
 
 import funcfinder.answers
 import funcfinder.questions
 from utils import TryImportError
-
-
-def search_questions(terms):
+from _behavior import check_arity, equivalence_classes, example_matches, parse_example
+from _dependencies import CodeDetector
+from _dispatch import best, calibrate, describe_table, dispatch_table
+from _imports import source as _source
+from _history import get_benchmark_history, machine_fingerprint, python_version
+from _memory import measure_memory
+from _catalog import answer_names, answers_by_arity, get_answer_catalog, get_question_catalog, is_repository_question
+from _parallel import (ordered_map, sandboxed_map, restart_timer, in_sandbox,
+                       DONE, TIMED_OUT, OUT_OF_MEMORY, CRASHED)
+from _rejections import get_rejection_stats
+from _results import (source_record, TextPrinter, AnswerResult, AnswerTiming, Crossover, EquivalentAnswers,
+                      FastFail, NoAnswers, NoScalingInputs, NoSolutions, NotFound, OverBudget, QuestionMatch, ScalingTimes, Solution,
+                      Source, Unanswerable, ANSWER, DEPENDENCY, QUESTION, SOLUTION)
+from _search import load_question_index
+from _signatures import get_argument_types, permute, type_signature
+from _verify import (dependency_names, get_verification_store, solves_pairs, verify_pairs, Verification,
+                     FAILED, PASSED, SKIPPED)
+from _timing import benchmark, crossovers, growth_exponent, record_calls, replay_calls, time_scaling
+
+_question_index = None
+
+# Maps (code object, index permutation or None) to the source shown by _get_source
+_sources = {}
+
+# Changes whenever the way timings or memory usage are measured changes, making the stored ones useless
+_TIMING_VERSION = 2
+
+
+def _get_question_index():
+    global _question_index
+    if _question_index is None:
+        catalog = get_question_catalog()
+        _question_index = load_question_index([(name, entry["doc"]) for name, entry in catalog.iteritems()])
+    return _question_index
+
+
+def find_questions(terms):
+    """
+    Yields a QuestionMatch for each question whose name and docstring contain all the terms, ignoring case,
+    best matches first.
+    """
     if isinstance(terms, basestring):
         terms = terms.split()
 
-    terms = map(str.lower, terms)
+    catalog = get_question_catalog()
+    for name in _get_question_index().search(terms):
+        yield QuestionMatch(name, inspect.cleandoc(catalog[name]["doc"] or ""))
+
 
+def search_questions(terms):
     print
+    if not _print_results(find_questions(terms)):
+        print "No questions found"
 
-    found = False
-    for question in funcfinder.questions.functions.itervalues():
-        search_string = (question.__name__ + question.__doc__).lower()
-        if all(imap(search_string.__contains__, terms)):
-            found = True
-            print question.__name__ + ":\n"
-            print pydoc.getdoc(question)
-            print "\n-----------------------\n"
 
+def _print_results(results):
+    """
+    Prints the records yielded by results as text, and returns the number of records.
+    """
+    printer = TextPrinter()
+    count = 0
+    try:
+        for record in results:
+            printer.print_record(record)
+            count += 1
+    finally:
+        printer.finish()
+    return count
+
+
+# The kinds of syntax tree nodes that can be the code of a dependency, by the name of the code object
+_FUNCTION_NODES = {"<lambda>": ast.Lambda, "<genexpr>": ast.GeneratorExp,
+                   "<setcomp>": ast.SetComp, "<dictcomp>": ast.DictComp}
+
+
+def _fingerprint(node):
+    if isinstance(node, ast.FunctionDef):
+        # _get_source leaves out decorators
+        node = ast.FunctionDef(node.name, node.args, node.body, [])
+    return ast.dump(node)
+
+
+def _fingerprints(source, name=None):
+    """
+    Fingerprints of the functions (including lambdas and generator expressions) in source, including nested ones.
+    Two functions have the same fingerprint if they have the same syntax tree, regardless of formatting
+    and comments. If name is given, only the fingerprint of the first function that could be the code object
+    with that name is returned.
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return [source]
+    node_types = tuple(_FUNCTION_NODES.values()) + (ast.FunctionDef,)
+    if name is not None:
+        node_types = _FUNCTION_NODES.get(name, ast.FunctionDef)
+    fingerprints = [_fingerprint(node) for node in ast.walk(tree) if isinstance(node, node_types)]
+    if name is not None:
+        return fingerprints[:1] or [source]
+    return fingerprints
+
+
+def _dependency_results(dependencies, existing_fingerprints):
+    """
+    Yields the Source of each dependency which isn't the same as, or nested in, a function that has been shown already.
+    """
+    for dependency in dependencies:
+        dependency_source = _get_source(dependency)
+        fingerprint = _fingerprints(dependency_source, dependency.co_name)[0]
+        if fingerprint in existing_fingerprints:
+            continue
+        existing_fingerprints.update(_fingerprints(dependency_source))
+        yield source_record(DEPENDENCY, dependency, dependency_source)
+
+
+def find_by_example(examples, processes=None, timeout=1.0):
+    """
+    Yields the Source and Solution (see funcfinder._results) of each answer in the repository which gives the
+    expected result for every example, or NoSolutions if there are none. examples are written as strings
+    like '4, 2 -> True' (see parse_example) or given as (arguments tuple, result) pairs.
+    Answers are checked in parallel using the given number of processes (by default one per CPU),
+    giving up on answers that take more than timeout seconds for a single example.
+    """
+    examples = [parse_example(example) if isinstance(example, basestring) else example for example in examples]
+    found = False
+    fingerprints = set()
+    for name, index_permutation in example_matches(examples, processes, timeout):
+        found = True
+        answer = funcfinder.answers.functions[name]
+        yield _source_result(SOLUTION, answer, fingerprints, index_permutation)
+        yield Solution(None, name, index_permutation, [q.__name__ for q in answer.solved_questions])
     if not found:
-        print "No questions found"
+        yield NoSolutions(None)
 
 
-def _show_dependencies(dependencies, existing_sources):
-    found_dependency = False
-    if dependencies:
-        for dependency in dependencies:
-            dependency_source = _get_source(dependency)
-            if dependency_source in existing_sources:
-                continue
+def by_example(examples, processes=None, timeout=1.0):
+    """
+    Shows the answers which give the expected result for every example (see find_by_example).
+    """
+    _print_results(find_by_example(examples, processes, timeout))
+
+
+def find_duplicates(processes=None, timeout=1.0):
+    """
+    Yields EquivalentAnswers for each group of answers in the repository which behave the same on a fixed set
+    of inputs (see equivalence_classes in funcfinder._behavior), running answers in parallel using the given number
+    of processes (by default one per CPU) and giving up on answers that take more than timeout seconds for an input.
+    Answers marked with ask_ignore aren't run.
+    """
+    names = [name for name, entry in get_answer_catalog().iteritems() if not entry["ask_ignore"]]
+    for answers in equivalence_classes(names, processes, timeout):
+        if len(answers) > 1:
+            yield EquivalentAnswers(answers)
+
+
+def show_duplicates(processes=None, timeout=1.0):
+    print
+    if not _print_results(find_duplicates(processes, timeout)):
+        print "No answers behave the same on every input tried."
 
-            spaceless_dependency_source = re.sub("\s+", "", dependency_source)
-            found_matching_source = False
-            for existing_source in existing_sources:
-                spaceless_existing_source = re.sub("\s+", "", existing_source)
-                if spaceless_dependency_source in spaceless_existing_source:
-                    found_matching_source = True
-                    break
-            if found_matching_source:
-                continue
 
-            if not found_dependency:
-                print "Dependencies:"
-                print
-                found_dependency = True
-            _show_source(dependency, dependency_source)
+def _import_answers(question):
+    """
+    Imports the modules defining the answers to the question so that `solves` has added them to question.answers.
+    """
+    for name in answer_names(question.__name__):
+        _ = funcfinder.answers.functions[name]
 
 
-def show_question(question, time_answers=True):
+def show_question(question, time_answers=True, processes=1, timeout=None, memory_limit=None, fast_fail=False,
+                  time_budget=10.0, time_precision=0.02, scaling=False, refresh=False, representatives=False):
+    """
+    Shows the source of the question, its answers and their dependencies, whether each answer passes, and timings.
+    Results and timings from previous calls are reused if none of the code involved has changed, unless refresh
+    is true.
+    """
     print
+    _print_results(question_results(question, time_answers=time_answers, processes=processes, timeout=timeout,
+                                    memory_limit=memory_limit, fast_fail=fast_fail, time_budget=time_budget,
+                                    time_precision=time_precision, scaling=scaling, refresh=refresh,
+                                    representatives=representatives))
+
+
+def question_results(question, time_answers=True, processes=1, timeout=None, memory_limit=None, fast_fail=False,
+                     time_budget=10.0, time_precision=0.02, scaling=False, refresh=False, representatives=False):
+    """
+    Yields the records (see funcfinder._results) of what show_question shows, as soon as each one is ready:
+    the Source of the question, then the Source and AnswerResult of each answer, an AnswerTiming per correct answer,
+    ScalingTimes and Crossovers if scaling is true, and finally the Source of each dependency.
+    A question that isn't in the repository gives NotFound, and a question without answers gives NoAnswers
+    followed by the results of asking it (see ask_results).
+    """
     if isinstance(question, basestring):
         try:
             question = funcfinder.questions.functions[question]
         except KeyError:
-            print "No question with name %s found" % question
+            yield NotFound(question)
             return
 
-    sources = set()
+    _import_answers(question)
+
+    fingerprints = set()
     dependencies = set()
 
-    _show_source_and_add_to_set(question, sources)
+    yield _source_result(QUESTION, question, fingerprints)
 
     if hasattr(question, "answers"):
-        print "Answers:"
-        print
         correct_answers = []
-        for answer in question.answers:
-            dependencies.update(_CodeDetector.detect(question, answer, include_questions=True))
-            _show_source_and_add_to_set(answer, sources)
-            try:
-                question(answer)
-                print "Passed tests successfully."
-                print "--------------------------"
-                print
-                correct_answers.append(answer)
-            except Exception as e:
-                print "Failed tests with exception:"
-                if not isinstance(e, TryImportError):
-                    tb_list = traceback.extract_tb(sys.exc_info()[2])
-                    tb_list = list(dropwhile(lambda entry: entry[2] != question.__name__, tb_list))
-                    print "".join(traceback.format_list(tb_list)).rstrip()
-                print "".join(traceback.format_exception_only(*sys.exc_info()[:2]))
+        store = get_verification_store()
+        try:
+            for answer in question.answers:
+                yield _source_result(ANSWER, answer, fingerprints)
+                record = None if refresh else store.record(question.__name__, answer.__name__)
+                if record is not None and (record["status"] == PASSED or "traceback" in record):
+                    status, traceback_text = record["status"], record.get("traceback")
+                    dependencies.update(filter(None, map(_catalog_code, record["dependencies"])))
+                else:
+                    status, traceback_text, answer_dependencies = _check_answer(question, answer)
+                    dependencies.update(answer_dependencies)
+                yield AnswerResult(question.__name__, answer.__name__, status, traceback_text)
+                if status == PASSED:
+                    correct_answers.append(answer)
 
-        if time_answers:
-            _time_answers(question, correct_answers)
+            if time_answers:
+                for result in _timing_results(question, correct_answers, time_budget, time_precision, refresh):
+                    yield result
+        finally:
+            store.save()
 
-        _show_dependencies(dependencies, sources)
+        if scaling and correct_answers:
+            for result in _scaling_results(question, correct_answers, time_budget, time_precision):
+                yield result
+
+        for result in _dependency_results(dependencies, fingerprints):
+            yield result
 
     else:
-        print "No answers have been marked as solving this question, which is a problem."
-        print "The question will now be asked manually. If any solutions are found, please contribute by adding:"
-        print
-        print "@solves(q.%s)" % question.__name__
-        print
-        print "to each solution."
+        yield NoAnswers(question.__name__)
+        for result in ask_results(question, time_answers=time_answers, processes=processes, timeout=timeout,
+                                  memory_limit=memory_limit, fast_fail=fast_fail, time_budget=time_budget,
+                                  time_precision=time_precision, representatives=representatives):
+            yield result
+
+
+def verify(processes=None, timeout=10.0, full=False):
+    """
+    Checks every (question, answer) pair marked with `solves` in the repository, in parallel using the given number
+    of processes (by default one per CPU), giving up on answers that take more than timeout seconds.
+    Pairs whose sources (and the sources of everything they call) haven't changed since they were last checked
+    keep their previous result, unless full is true.
+    Prints a line for each pair that didn't pass and a summary, and returns the number of such pairs
+    (not counting answers skipped because they need a library that isn't installed).
+    """
+    start = time.time()
+    pairs = solves_pairs()
+    counts = defaultdict(int)
+    unchanged = 0
+    for verification, stored in verify_pairs(pairs, processes=processes, timeout=timeout, full=full):
+        counts[verification.status] += 1
+        unchanged += stored
+        if verification.status != PASSED:
+            print "%-12s %s <- %s%s" % (verification.status.upper(), verification.question, verification.answer,
+                                        ": " + verification.message if verification.message else "")
+
+    problems = len(pairs) - counts[PASSED] - counts[SKIPPED]
+    if problems or counts[SKIPPED]:
         print
-        ask(question, time_answers=time_answers)
+    print "Verified %i pairs (%i unchanged since the last run) in %.1f seconds: %s" % (
+        len(pairs), unchanged, time.time() - start,
+        ", ".join("%i %s" % (count, status) for status, count in sorted(counts.iteritems())))
+    return problems
+
+
+def _check_answer(question, answer):
+    """
+    Runs the question with the answer and stores the result. Returns the status (PASSED, FAILED or SKIPPED),
+    the traceback to show if it didn't pass, and the code of the questions and answers it depends on.
+    """
+    try:
+        CodeDetector.run(question, answer)
+        status, message, traceback_text = PASSED, None, None
+    except Exception as e:
+        status = SKIPPED if isinstance(e, TryImportError) else FAILED
+        message = traceback_text = "".join(traceback.format_exception_only(*sys.exc_info()[:2]))
+        if not isinstance(e, TryImportError):
+            tb_list = traceback.extract_tb(sys.exc_info()[2])
+            tb_list = list(dropwhile(lambda entry: entry[2] != question.__name__, tb_list))
+            traceback_text = "".join(traceback.format_list(tb_list)).rstrip() + "\n" + message
+        message = message.strip()
+    get_verification_store().update(Verification(question.__name__, answer.__name__, status, message),
+                                    dependency_names(question, answer), traceback_text)
+    return status, traceback_text, CodeDetector.detect(question, answer, include_questions=True)
+
+
+def _catalog_code(name):
+    """
+    The code of a question or answer in the repository from a name like 'questions:copy_dict',
+    or None if there is no such function (any more).
+    """
+    package, function_name = name.split(":", 1)
+    functions = funcfinder.questions.functions if package == "questions" else funcfinder.answers.functions
+    if function_name not in functions:
+        return None
+    return functions[function_name].func_code
 
 
 def _get_source(func, index_permutation=None):
+    """
+    The source of the function (or code object) starting from its def line, so without decorators.
+    If index_permutation reorders the arguments, the parameters are shown in that order.
+    Results are cached per code object and permutation.
+    """
+    code = getattr(func, "func_code", func)
+    if index_permutation is not None and list(index_permutation) == sorted(index_permutation):
+        index_permutation = None
+    key = code, index_permutation and tuple(index_permutation)
     try:
-        name = func.__name__
-    except AttributeError:
-        name = func.co_name
-    pattern = r"(def\s+%s\(.+)" % name
-    regex = re.compile(pattern, re.DOTALL)
-    source = inspect.getsource(func).strip()
-    match = regex.search(source)
-    if match is not None:
-        source = match.group(1)
-    if index_permutation and len(index_permutation) > 1 and list(index_permutation) != sorted(index_permutation):
-        pattern = r"(def\s+%s)\((.+?)\)(.+)" % name
-        regex = re.compile(pattern, re.DOTALL)
-        match = regex.search(source)
-        if match is None:
+        return _sources[key]
+    except KeyError:
+        pass
+
+    source = textwrap.dedent(_source(func))
+    definition = _parse_definition(source, getattr(func, "__name__", code.co_name))
+    if definition is None:
+        if index_permutation:
             raise Exception("Failed to extract arguments from function definition:\n" + source)
-        args = re.split(r"\s*,\s*", match.group(2), flags=re.DOTALL)
-        args = _permute(args, index_permutation)
-        args = ", ".join(args)
-        source = "{start}({args}){rest}".format(start=match.group(1), args=args, rest=match.group(3))
-    return source
+        result = source.strip()
+    else:
+        def_offset, parameters = definition
+        if index_permutation:
+            if len(parameters) < len(index_permutation):
+                raise Exception("Failed to extract arguments from function definition:\n" + source)
+            texts = [source[start:end] for start, end in parameters]
+            texts = permute(texts, index_permutation) + tuple(texts[len(index_permutation):])
+            source = source[:parameters[0][0]] + ", ".join(texts) + source[parameters[-1][1]:]
+        result = source[def_offset:].strip()
+
+    _sources[key] = result
+    return result
+
+
+def _parse_definition(source, name):
+    """
+    Finds the definition of the function called name in source. Returns the offset of the def keyword
+    and a list of the (start, end) offsets of each parameter including any default value,
+    or None if the definition can't be found.
+    """
+    line_offsets = [0]
+    for line in source.splitlines(True):
+        line_offsets.append(line_offsets[-1] + len(line))
+
+    def offset((row, column)):
+        return line_offsets[row - 1] + column
+
+    tokens = tokenize.generate_tokens(StringIO(source).readline)
+    try:
+        previous = None
+        for token in tokens:
+            if previous is not None and previous[1] == "def" and token[1] == name:
+                break
+            previous = token
+        else:
+            return None
+
+        parameters = []
+        depth = 0
+        # The number of lambdas in default values whose parameters (and therefore commas) haven't ended yet
+        open_lambdas = 0
+        start = end = None
+        for token_type, string, token_start, token_end, _ in tokens:
+            if depth == 1 and string == "lambda":
+                open_lambdas += 1
+            elif depth == 1 and open_lambdas and string == ":":
+                open_lambdas -= 1
+            elif token_type == tokenize.OP and string in "([{":
+                depth += 1
+                if depth == 1:
+                    continue
+            elif token_type == tokenize.OP and string in ")]}":
+                depth -= 1
+                if depth == 0:
+                    break
+            elif token_type == tokenize.OP and string == "," and depth == 1 and not open_lambdas:
+                parameters.append((start, end))
+                start = None
+                continue
+            elif token_type in (tokenize.NL, tokenize.COMMENT):
+                continue
+            if start is None:
+                start = offset(token_start)
+            end = offset(token_end)
+        if start is not None:
+            parameters.append((start, end))
+    except tokenize.TokenError:
+        return None
+    return offset(previous[2]), parameters
 
 
-def _show_source(func, source):
-    print inspect.getsourcefile(func), ":", inspect.getsourcelines(func)[1]
-    print source
+def _source_result(role, func, fingerprints_set, index_permutation=None):
+    source = _get_source(func, index_permutation)
+    fingerprints_set.update(_fingerprints(source))
+    return source_record(role, func, source)
+
+
+def _timing_results(question, correct_answers, budget, precision, refresh=False):
+    """
+    Yields an AnswerTiming for each of the correct answers, if there's more than one. The stored timings are used
+    instead if they were all measured on this machine and version of Python with the same settings,
+    and the code hasn't changed since. Timings are only stored for questions in the repository.
+    """
+    if len(correct_answers) > 1:
+        store = get_verification_store()
+        in_repository = is_repository_question(question)
+        settings = [python_version(), machine_fingerprint(), budget, precision, _TIMING_VERSION]
+        stored = [(store.record(question.__name__, answer.__name__) or {}).get("timing") if in_repository else None
+                  for answer in correct_answers]
+        if not refresh and all(timing and timing["settings"] == settings and "result" in timing
+                               for timing in stored):
+            for timing in stored:
+                yield AnswerTiming(**timing["result"])
+            return
+
+        timings = []
+        budget /= len(correct_answers)
+        for answer in correct_answers:
+            timing, answer_timing, calls = _benchmark_answer(question, answer, budget, precision)
+            timings.append((answer, timing, answer_timing))
+            memory = measure_memory(lambda: replay_calls(answer, calls, keep_results=True))
+            peak, retained, objects = (None, None, None) if memory is None else memory
+            result = AnswerTiming(question.__name__, answer.__name__,
+                                  timing.median, timing.minimum, timing.stddev, timing.runs, timing.number,
+                                  answer_timing.median, answer_timing.minimum, peak, retained, objects,
+                                  timing.precise and answer_timing.precise, precision)
+            if in_repository:
+                store.update_timing(question.__name__, answer.__name__,
+                                    dict(settings=settings, result=result._asdict()))
+            yield result
+        get_benchmark_history().record(question, timings)
+
+
+def _benchmark_answer(question, answer, budget, precision):
+    """
+    Times the whole question with the answer and then just the calls to the answer, spending about budget seconds
+    in total. Returns both timings and the recorded calls.
+    """
+    timing = benchmark(lambda: question(answer), budget / 2, precision)
+    calls = record_calls(question, answer)
+    answer_timing = benchmark(lambda: replay_calls(answer, calls), budget / 2, precision)
+    return timing, answer_timing, calls
+
+
+def benchmark_questions(questions=None, budget=2.0, precision=0.02, threshold=0.2, baseline_python=None):
+    """
+    Times the correct answers of each of the questions (by default every question in the repository with more than
+    one answer), records the times, and compares the relative speeds of the answers with the most recent earlier
+    run on this machine (on the given version of Python, if any). Reports the answers whose time relative to the
+    fastest answer changed by more than the threshold fraction, including when that changes which answer is fastest.
+    Answers whose times couldn't be measured to within precision in the time budget aren't compared.
+    Returns the number of questions with such changes.
+    """
+    if questions is None:
+        questions = [name for name in get_question_catalog() if len(answer_names(name)) > 1]
+
+    history = get_benchmark_history()
+    print "Timing answers with %s on machine %s..." % (python_version(), machine_fingerprint())
+    print
+    changed = 0
+    for question in questions:
+        if isinstance(question, basestring):
+            if question not in get_question_catalog():
+                print "No question with name %s found" % question
+                continue
+            question = funcfinder.questions.functions[question]
+        _import_answers(question)
+
+        timings = []
+        answers = getattr(question, "answers", [])
+        for answer in answers:
+            try:
+                question(answer)
+            except Exception as e:
+                print "%s: %s failed, skipping it: %s" % (question.__name__, answer.__name__,
+                                                           "".join(traceback.format_exception_only(type(e), e)).strip())
+                continue
+            timing, answer_timing, _ = _benchmark_answer(question, answer, budget / len(answers), precision)
+            timings.append((answer, timing, answer_timing))
+        if len(timings) < 2:
+            print "%s: fewer than two correct answers to compare" % question.__name__
+            continue
+        history.record(question, timings)
+
+        comparison = history.compare(question.__name__, threshold, baseline_python)
+        fastest = min(timings, key=lambda (_, __, answer_timing): answer_timing.median)[0].__name__
+        imprecise = [answer.__name__ for answer, timing, answer_timing in timings
+                     if not (timing.precise and answer_timing.precise)]
+        has_baseline = comparison is not None and comparison.baseline is not None
+        if len(timings) - len(imprecise) < 2:
+            print "%s: fastest is %s, too few answers were timed precisely to compare" % (question.__name__, fastest)
+        elif not has_baseline:
+            print "%s: fastest is %s, no baseline to compare with yet" % (question.__name__, fastest)
+        else:
+            baseline = comparison.baseline
+            print "%s: fastest is %s, compared with %s from %s" % (
+                question.__name__, fastest, baseline["python"],
+                time.strftime("%Y-%m-%d %H:%M", time.localtime(float(baseline["run"]))))
+        if imprecise:
+            print "    Not compared since they ran out of time before being measured to within %g%%: %s" % (
+                precision * 100, ", ".join(imprecise))
+        if not has_baseline:
+            continue
+        # The fastest answer has only really changed if it's now slower by more than the threshold
+        if any(change.answer == comparison.baseline_fastest for change in comparison.changes):
+            print "    The fastest answer changed from %s to %s" % (comparison.baseline_fastest, comparison.fastest)
+        for change in comparison.changes:
+            print "    %s went from %.2fx to %.2fx the time of the fastest answer" % (
+                change.answer, change.baseline_speed, change.speed)
+        if comparison.changes:
+            changed += 1
+
     print
+    print "%i of %i questions changed by more than %g%% relative to the fastest answer." % (
+        changed, len(questions), threshold * 100)
+    return changed
 
 
-def _show_source_and_add_to_set(func, sources_set, index_permutation=None):
-    source = _get_source(func, index_permutation)
-    sources_set.add(source)
-    _show_source(func, source)
+def _scaling_results(question, correct_answers, budget, precision):
+    """
+    Yields ScalingTimes for each of the correct answers once they've all been timed, and then the Crossovers.
+    """
+    if not hasattr(question, "scaling_inputs"):
+        yield NoScalingInputs(question.__name__)
+        return
 
+    sizes, times_by_name = time_scaling(question, correct_answers, budget, precision)
+    for name, times in times_by_name.iteritems():
+        yield ScalingTimes(question.__name__, name, sizes, times, growth_exponent(sizes, times))
 
-def _time(question, answer, number=1):
-    def stmt():
-        question(answer)
+    for faster, slower, size in crossovers(sizes, times_by_name):
+        yield Crossover(question.__name__, faster, slower, size)
 
-    if number == 1:
-        time_taken = 0
-        while time_taken < 1:
-            number *= 2
-            time_taken = timeit.timeit(stmt, number=number)
-    return min(timeit.repeat(stmt, number=number, repeat=5)), number
 
+def ask(question, time_answers=True, processes=1, timeout=None, memory_limit=None, fast_fail=False,
+        time_budget=10.0, time_precision=0.02, representatives=False):
+    _print_results(ask_results(question, time_answers=time_answers, processes=processes, timeout=timeout,
+                               memory_limit=memory_limit, fast_fail=fast_fail, time_budget=time_budget,
+                               time_precision=time_precision, representatives=representatives))
 
-def _time_answers(question, correct_answers):
-    if len(correct_answers) > 1:
-        print "Best times per answer:"
-        number = 1
-        for answer in correct_answers:
-            time_taken, number = _time(question, answer, number)
-            print "%s: %.3f s" % (answer.__name__, time_taken)
-        print "(among 5 sets of %i repetitions)" % number
-        print
 
+def ask_results(question, time_answers=True, processes=1, timeout=None, memory_limit=None, fast_fail=False,
+                time_budget=10.0, time_precision=0.02, representatives=False):
+    """
+    Yields the records (see funcfinder._results) of what ask shows, as soon as each one is ready:
+    the Source and Solution of each answer that solves the question, an AnswerTiming per solution,
+    and the Source of each dependency, along with FastFail, OverBudget, NoSolutions or Unanswerable if they apply.
 
-def ask(question, time_answers=True):
-    num_args_holder = []
+    If representatives is true, only one answer out of each group of answers that behave the same
+    (see find_duplicates) is tried at first, and the rest of the group only if it solves the question.
+    """
+    probed_signatures = []
 
     def count_expected_args(*args):
-        num_args_holder.append(len(args))
+        probed_signatures.append(type_signature(args))
 
     exc_info = None
 
@@ -184,7 +584,7 @@ def ask(question, time_answers=True):
         exc_info = sys.exc_info()
         pass
 
-    if not num_args_holder:
+    if not probed_signatures:
         if exc_info:
             raise exc_info[0], exc_info[1], exc_info[2]
         else:
@@ -193,61 +593,233 @@ def ask(question, time_answers=True):
 
     del exc_info
 
-    num_args = num_args_holder[0]
+    probed_signature = probed_signatures[0]
+    num_args = len(probed_signature)
     index_permutations = list(permutations(range(num_args)))
 
+    argument_types = get_argument_types()
+    rejection_stats = get_rejection_stats()
+    answers = []
+    answers_types = []
+    for name in answers_by_arity().get(num_args, []):
+        answer_types = argument_types.for_answer(name, question)
+        if any(_worth_trying(answer_types, probed_signature, index_permutation)
+               for index_permutation in index_permutations):
+            answers.append(funcfinder.answers.functions[name])
+            answers_types.append(answer_types)
+    # Try the orders of arguments most likely to work first
+    answers_permutations = [sorted(index_permutations,
+                                   key=lambda index_permutation: answer_types.order(
+                                       permute(probed_signature, index_permutation)))
+                            for answer_types in answers_types]
+    over_budget = defaultdict(list)
+
+    def run_trials(answer_indices, call_limit):
+        """
+        Yields the index of each answer that was tried, the permutations of its arguments that passed,
+        and the names of the questions and answers called with the first passing permutation (see dependency_names).
+        """
+
+        def try_answer(answer_index):
+            return _try_answer(question, answers[answer_index], answers_permutations[answer_index],
+                               probed_signature, answers_types[answer_index], call_limit)
+
+        if timeout is None and memory_limit is None:
+            results = ((DONE, result) for result in ordered_map(try_answer, answer_indices, processes))
+        else:
+            results = sandboxed_map(try_answer, answer_indices, processes, timeout, memory_limit)
+
+        for answer_index, (status, result) in izip(answer_indices, results):
+            answer = answers[answer_index]
+            if status != DONE:
+                over_budget[status].append(answer.__name__)
+                continue
+            passing_permutations, answers_types[answer_index], rejections, called_names = result
+            argument_types.update(answer.__name__, question, answers_types[answer_index])
+            rejection_stats.record(question, rejections)
+            yield answer_index, passing_permutations, called_names
+
     correct_answers = []
     dependencies = set()
-    sources = set()
-    for answer in funcfinder.answers.functions.itervalues():
-        if not getattr(answer, "ask_ignore", False) and answer.func_code.co_argcount == num_args:
-            for index_permutation in index_permutations:
-                try:
-                    permuted_answer = _permute_args(index_permutation)(answer)
-                    question(permuted_answer)
-                except (_ForbiddenKwargs, _WrongNumberOfArgs) as e:
-                    print e.message
-                    return
-                except Exception:
-                    pass
-                else:
-                    _show_source_and_add_to_set(answer, sources, index_permutation)
-                    solved_questions = getattr(answer, "solved_questions")
-                    if solved_questions:
-                        print "Solves the question%s %s" % (
-                            "s" * (len(solved_questions) > 1),
-                            ", ".join(q.__name__ for q in solved_questions))
-                        print
-                    print "-------------------------"
-                    print
-                    correct_answers.append(permuted_answer)
-                    dependencies.update(_CodeDetector.detect(question, permuted_answer, include_questions=False))
-                    dependencies.discard(answer.func_code)
-                    break
+    fingerprints = set()
+    try:
+        answer_indices = range(len(answers))
+        # Maps the index of a representative answer to the indices of the other answers that behave the same
+        equivalents = {}
+        if representatives:
+            answer_indices = []
+            indices = dict((answer.__name__, answer_index) for answer_index, answer in enumerate(answers))
+            for names in equivalence_classes([answer.__name__ for answer in answers], processes, timeout or 1.0):
+                answer_indices.append(indices[names[0]])
+                equivalents[indices[names[0]]] = [indices[name] for name in names[1:]]
+
+        call_limit = fast_fail and rejection_stats.call_limit(question)
+        if call_limit:
+            yield FastFail(question.__name__, call_limit, rejection_stats.most_rejecting_line(question))
+            smoke_results = list(run_trials(answer_indices, call_limit))
+            answer_indices = []
+            for answer_index, passing_permutations, _ in smoke_results:
+                if passing_permutations:
+                    answer_indices.append(answer_index)
+                    answers_permutations[answer_index] = passing_permutations
+
+        while answer_indices:
+            solved_indices = []
+            for answer_index, passing_permutations, called_names in run_trials(answer_indices, None):
+                if not passing_permutations:
+                    continue
+                solved_indices.append(answer_index)
+                answer = answers[answer_index]
+                index_permutation = passing_permutations[0]
+                permuted_answer = _permute_args(index_permutation)(answer)
+                yield _source_result(SOLUTION, answer, fingerprints, index_permutation)
+                yield Solution(question.__name__, answer.__name__, index_permutation,
+                               [q.__name__ for q in answer.solved_questions])
+                correct_answers.append(permuted_answer)
+                dependencies.update(filter(None, [_catalog_code(name) for name in called_names
+                                                  if name.startswith("answers:")]))
+                dependencies.discard(answer.func_code)
+            # Try the answers that behave the same as the representatives that solved the question
+            answer_indices = [other_index for answer_index in solved_indices
+                              for other_index in equivalents.get(answer_index, [])]
+    except (_ForbiddenKwargs, _WrongNumberOfArgs) as e:
+        yield Unanswerable(question.__name__, e.message)
+        return
+    finally:
+        argument_types.save()
+        rejection_stats.save()
+
+    for status, limit in ((TIMED_OUT, timeout), (OUT_OF_MEMORY, memory_limit), (CRASHED, None)):
+        if over_budget[status]:
+            yield OverBudget(question.__name__, status, over_budget[status], limit)
 
     if not correct_answers:
-        print "Sorry, no correct answers found. If you find one, please consider contributing it!"
+        yield NoSolutions(question.__name__)
         return
 
     if time_answers:
-        _time_answers(question, correct_answers)
-    _show_dependencies(dependencies, sources)
-
-
-def _permute_args(index_permutation):
-    @wrapt.decorator
-    def wrapper(wrapped, _, args, kwargs):
-        if kwargs:
-            raise _ForbiddenKwargs
-        if len(index_permutation) != len(args):
-            raise _WrongNumberOfArgs
-        return wrapped(*_permute(args, index_permutation))
-
-    return wrapper
+        for result in _timing_results(question, correct_answers, time_budget, time_precision):
+            yield result
+    for result in _dependency_results(dependencies, fingerprints):
+        yield result
+
+
+def _try_answer(question, answer, index_permutations, probed_signature, answer_types, call_limit=None):
+    """
+    Tries the answer with the question, rearranging its arguments with each of the given permutations,
+    skipping those which have failed the question before or would give the answer arguments of types
+    it's known to crash on.
+
+    Normally this stops at the first permutation which passes. If call_limit is given, the question is stopped
+    after that many calls to the answer and every permutation that gets that far is considered a pass.
+
+    Returns a list of the passing permutations, answer_types updated with the argument types the answer was seen
+    to accept or crash on, a (number of calls, line of the question, seconds taken) tuple for every failure,
+    and the names of the questions and answers called with the passing permutation (see dependency_names),
+    found here so that this works in worker processes too. The names are empty if call_limit is given.
+    """
+    trial = _Trial(call_limit)
+    passing_permutations = []
+    rejections = []
+    dependencies = []
+    for index_permutation in index_permutations:
+        if not _worth_trying(answer_types, probed_signature, index_permutation):
+            continue
+        restart_timer()
+        trial.calls = 0
+        start = time.time()
+        try:
+            question(_permute_args(index_permutation, trial)(answer))
+        except (_ForbiddenKwargs, _WrongNumberOfArgs):
+            raise
+        except _CallLimitReached:
+            passing_permutations.append(index_permutation)
+        except Exception as e:
+            if isinstance(e, MemoryError) and in_sandbox():
+                raise
+            rejections.append((trial.calls, _failing_line(question, sys.exc_info()[2]), time.time() - start))
+            # A missing library may be installed later, like when verifying
+            if not isinstance(e, TryImportError):
+                answer_types.failed[index_permutation] = time.time()
+        else:
+            passing_permutations.append(index_permutation)
+            if call_limit is None:
+                # Running the question once more under the profiler is cheaper than profiling every trial
+                dependencies = dependency_names(question, _permute_args(index_permutation)(answer))
+                break
+        finally:
+            answer_types.observe(trial.observed_types)
+            trial.observed_types.clear()
+    return passing_permutations, answer_types, rejections, dependencies
+
+
+def _worth_trying(answer_types, probed_signature, index_permutation):
+    return (index_permutation not in answer_types.failed and
+            answer_types.may_accept(permute(probed_signature, index_permutation)))
+
+
+def _failing_line(question, tb):
+    line = None
+    while tb is not None:
+        if tb.tb_frame.f_code is question.func_code:
+            line = tb.tb_lineno
+        tb = tb.tb_next
+    return line
+
+
+class _Trial(object):
+    """
+    The state of a question being tried with one answer: how many times the answer has been called,
+    and the type signatures (see type_signature) it was called with mapped to whether it accepted them.
+    """
+
+    def __init__(self, call_limit=None):
+        self.call_limit = call_limit
+        self.calls = 0
+        self.observed_types = {}
+
+
+class _CallLimitReached(BaseException):
+    """
+    Stops a question during the smoke pass. It isn't an Exception, so that the question can't catch it
+    (e.g. with assertRaises or `except Exception`) and carry on past the limit.
+    """
+
+
+def _permute_args(index_permutation, trial=None):
+    """
+    Returns a decorator which makes a function take its arguments in a different order,
+    so that calling the result with args calls the function with permute(args, index_permutation).
+    If a _Trial is given, calls to the function are counted and their argument types observed.
+    """
+    num_args = len(index_permutation)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if kwargs:
+                raise _ForbiddenKwargs
+            if len(args) != num_args:
+                raise _WrongNumberOfArgs
+            args = permute(args, index_permutation)
+            if trial is None:
+                return func(*args)
+            if trial.calls == trial.call_limit:
+                raise _CallLimitReached
+            trial.calls += 1
+            signature = type_signature(args)
+            try:
+                result = func(*args)
+            except (TypeError, AttributeError):
+                trial.observed_types.setdefault(signature, False)
+                raise
+            trial.observed_types[signature] = True
+            return result
 
+        wrapper.__wrapped__ = func
+        return wrapper
 
-def _permute(it, index_permutation):
-    return (it[i] for i in index_permutation)
+    return decorator
 
 
 class _ForbiddenKwargs(Exception):
@@ -256,40 +828,3 @@ class _ForbiddenKwargs(Exception):
 
 class _WrongNumberOfArgs(Exception):
     message = "The function you ask for must always have the same number of arguments."
-
-
-class _CodeDetector(Bdb):
-    def __init__(self, *args):
-        Bdb.__init__(self, *args)
-        self.codes = set()
-
-    def do_clear(self, arg):
-        pass
-
-    def user_call(self, frame, argument_list):
-        self.codes.add(frame.f_code)
-
-    @classmethod
-    def detect(cls, question, answer, include_questions):
-        detector = cls()
-        detector.set_trace()
-        try:
-            question(answer)
-        except Exception:
-            pass
-        detector.set_quit()
-        for func in (question, answer):
-            detector.codes.discard(func.func_code)
-
-        filtered_codes = set()
-
-        for code in detector.codes:
-            filename = code.co_filename
-
-            def from_package(package):
-                return ("funcfinder/%s/" % package) in filename and not filename.endswith("__init__.py")
-
-            # noinspection PyTypeChecker
-            if from_package("answers") or include_questions and from_package("questions"):
-                filtered_codes.add(code)
-        return filtered_codes
@@ -1,24 +1,133 @@
 from argparse import ArgumentParser
+import shlex
+import traceback
 
 from funcfinder import *
+from funcfinder._daemon import forward, serve
+from funcfinder._results import to_json, End
+
+
+def emit(results):
+    """
+    Prints each record as a line of JSON as soon as it's ready.
+    """
+    for record in results:
+        print to_json(record)
+        sys.stdout.flush()
 
 
 def find(args):
+    if args.ndjson:
+        emit(find_questions(args.terms))
+        return
     print "Searching for the terms %s..." % args.terms
     search_questions(args.terms)
 
 
 def show(args):
-    show_question(args.question, time_answers=args.time_answers)
+    options = dict(time_answers=args.time_answers, processes=args.processes,
+                   timeout=args.timeout, memory_limit=args.memory_limit, fast_fail=args.fast_fail,
+                   time_budget=args.time_budget, time_precision=args.time_precision, scaling=args.scaling,
+                   refresh=args.refresh, representatives=args.representatives)
+    if args.ndjson:
+        emit(question_results(args.question, **options))
+    else:
+        show_question(args.question, **options)
+
+
+def by_example_command(args):
+    try:
+        examples = map(parse_example, args.examples)
+        check_arity(examples)
+    except ValueError as e:
+        print e
+        return 2
+    if args.ndjson:
+        emit(find_by_example(examples, processes=args.processes, timeout=args.timeout))
+    else:
+        by_example(examples, processes=args.processes, timeout=args.timeout)
+
+
+def duplicates(args):
+    if args.ndjson:
+        emit(find_duplicates(processes=args.processes, timeout=args.timeout))
+    else:
+        show_duplicates(processes=args.processes, timeout=args.timeout)
+
+
+def bench(args):
+    unknown = [name for name in args.questions if name not in get_question_catalog()]
+    if unknown:
+        for name in unknown:
+            print "No question with name %s found" % name
+        return 2
+    changed = benchmark_questions(args.questions or None, budget=args.time_budget, precision=args.time_precision,
+                                  threshold=args.threshold, baseline_python=args.baseline_python)
+    return 1 if changed else 0
+
+
+def calibrate_command(args):
+    questions = args.questions or [name for name in get_question_catalog() if len(answer_names(name)) > 1]
+    for name in questions:
+        try:
+            table = calibrate(name, budget=args.time_budget, precision=args.time_precision, processes=args.processes)
+        except (KeyError, ValueError) as e:
+            print "%s: %s" % (name, e.args[0])
+            continue
+        print "%s: %s" % (name, describe_table(table))
+
+
+def verify_command(args):
+    return 1 if verify(processes=args.processes, timeout=args.timeout, full=args.full) else 0
+
+
+def batch(args):
+    """
+    Runs find and show commands read from stdin, one per line, printing their results as JSON lines,
+    each command followed by an End record.
+    """
+    parser = make_parser()
+    for line in iter(sys.stdin.readline, ""):
+        line = line.strip()
+        if not line:
+            continue
+        status, error = 0, None
+        try:
+            command_args = parser.parse_args(shlex.split(line))
+            if command_args.func in (find, show):
+                command_args.ndjson = True
+                command_args.func(command_args)
+            else:
+                status, error = 2, "Only find and show commands can be run in a batch"
+        except SystemExit as e:
+            status, error = e.code or 0, "Invalid command"
+        except Exception as e:
+            traceback.print_exc()
+            status, error = 1, "".join(traceback.format_exception_only(type(e), e)).strip()
+        print to_json(End(line, status, error))
+        sys.stdout.flush()
 
 
 def funcfinder_help():
     pass
 
 
-def main():
+def serve_command(args):
+    if in_server:
+        print "The serve command can't be run by the server."
+        return 1
+    return serve(run)
+
+
+def make_parser():
     parser = ArgumentParser(
         description="Find (using docstrings, not tests) and inspect functions in the funcfinder repository.")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="Run the command in this process even if a server started by 'funcfinder serve' "
+                             "is running.")
+    parser.add_argument("--ndjson", action="store_true",
+                        help="For find, show, by-example and duplicates, print each result as a line of JSON as soon as it's ready "
+                             "instead of the usual text.")
     subparsers = parser.add_subparsers()
 
     find_parser = subparsers.add_parser(
@@ -37,9 +146,152 @@ def main():
                              help="By default if a question has multiple solutions they are automatically timed, "
                                   "which takes a few seconds. This flag prevents that.",
                              action="store_false", dest="time_answers")
+    show_parser.add_argument("--budget", type=float, default=10.0, metavar="SECONDS", dest="time_budget",
+                             help="Roughly the total time to spend timing answers, shared equally between them "
+                                  "(default 10).")
+    show_parser.add_argument("--precision", type=float, default=0.02, metavar="FRACTION", dest="time_precision",
+                             help="Stop timing an answer once the 95%% confidence interval of its mean time is "
+                                  "within this fraction of the mean on either side (default 0.02).")
+    show_parser.add_argument("--scaling", action="store_true",
+                             help="Also time the correct answers on inputs of increasing size (if the question "
+                                  "declares how to generate them) to show how they scale and which is fastest "
+                                  "at each size. This uses the same time budget again.")
+    show_parser.add_argument("--refresh", action="store_true",
+                             help="Run and time the answers again even if nothing has changed since the last time "
+                                  "they were shown, instead of using the stored results.")
+    show_parser.add_argument("-j", "--processes", type=int, nargs="?", default=1, const=None,
+                             help="If the question has no answers and has to be asked, try answers in parallel "
+                                  "using this many processes, or one per CPU if no number is given.")
+    show_parser.add_argument("--timeout", type=float, metavar="SECONDS",
+                             help="When asking, run each trial in a separate process and give up on answers "
+                                  "that take longer than this for a single ordering of arguments.")
+    show_parser.add_argument("--memory", type=int, metavar="MB", dest="memory_limit",
+                             help="When asking, run each trial in a separate process and give up on answers "
+                                  "that allocate more than this many megabytes.")
+    show_parser.add_argument("--fast-fail", action="store_true",
+                             help="When asking, first try every answer with only the start of the question, "
+                                  "up to the point where it has rejected most wrong answers in the past, "
+                                  "and only run the full question for the answers that get that far.")
+    show_parser.add_argument("--representatives", action="store_true",
+                             help="When asking, first try only one answer out of each group of answers that "
+                                  "behave the same (see the duplicates subcommand), and try the rest of a group "
+                                  "only if that answer solves the question.")
+
+    by_example_parser = subparsers.add_parser(
+        "by-example",
+        description="Shows the answers which give the expected result for each of the examples, "
+                    "trying their arguments in any order. Answers are first narrowed down using what they returned "
+                    "for a fixed set of inputs (stored in the cache directory), and only those are run on the examples.")
+    by_example_parser.set_defaults(func=by_example_command)
+    by_example_parser.add_argument("examples", metavar="EXAMPLE", nargs="+",
+                                   help="An example written as 'ARGUMENTS -> RESULT' using Python literals, "
+                                        "e.g. '[[1, 2], [3, 4]] -> [[1, 3], [2, 4]]' or '4, 2 -> True'.")
+    by_example_parser.add_argument("-j", "--processes", type=int,
+                                   help="The number of processes to use (default one per CPU).")
+    by_example_parser.add_argument("--timeout", type=float, default=1.0, metavar="SECONDS",
+                                   help="Give up on an answer that takes longer than this for a single input "
+                                        "(default 1).")
+
+    duplicates_parser = subparsers.add_parser(
+        "duplicates",
+        description="Shows the groups of answers which return the same results (of the same types) as each other "
+                    "for every input in a fixed set, and raise the same exceptions.")
+    duplicates_parser.set_defaults(func=duplicates)
+    duplicates_parser.add_argument("-j", "--processes", type=int,
+                                   help="The number of processes to use (default one per CPU).")
+    duplicates_parser.add_argument("--timeout", type=float, default=1.0, metavar="SECONDS",
+                                   help="Give up on an answer that takes longer than this for a single input "
+                                        "(default 1).")
+
+    bench_parser = subparsers.add_parser(
+        "bench",
+        description="Times the answers to every question with more than one answer, stores the times in the cache "
+                    "directory, and compares the relative speeds of the answers with the last run on this machine. "
+                    "Exits with status 1 if any answer's speed relative to the fastest answer changed by more "
+                    "than the threshold, or the fastest answer changed.")
+    bench_parser.set_defaults(func=bench)
+    bench_parser.add_argument("questions", metavar="QUESTION", nargs="*",
+                              help="Only time these questions.")
+    bench_parser.add_argument("--budget", type=float, default=2.0, metavar="SECONDS", dest="time_budget",
+                              help="Roughly the time to spend timing the answers of each question (default 2).")
+    bench_parser.add_argument("--precision", type=float, default=0.02, metavar="FRACTION", dest="time_precision",
+                              help="As for the show subcommand (default 0.02).")
+    bench_parser.add_argument("--threshold", type=float, default=0.2, metavar="FRACTION",
+                              help="Report answers whose time relative to the fastest answer changed by more than "
+                                   "this fraction (default 0.2).")
+    bench_parser.add_argument("--baseline-python", metavar="VERSION",
+                              help="Compare with the last run on this version of Python, written as "
+                                   "e.g. 'CPython 2.7.18', instead of the last run on any version.")
+
+    calibrate_parser = subparsers.add_parser(
+        "calibrate",
+        description="Times the answers which pass each question across the input sizes it declares, and stores "
+                    "which answer is fastest for each size (the length of the first argument), "
+                    "for funcfinder.best to use.")
+    calibrate_parser.set_defaults(func=calibrate_command)
+    calibrate_parser.add_argument("questions", metavar="QUESTION", nargs="*",
+                                  help="Only calibrate these questions, instead of every question with more than "
+                                       "one answer.")
+    calibrate_parser.add_argument("--budget", type=float, default=2.0, metavar="SECONDS", dest="time_budget",
+                                  help="Roughly the time to spend timing the answers of each question (default 2).")
+    calibrate_parser.add_argument("--precision", type=float, default=0.02, metavar="FRACTION",
+                                  dest="time_precision",
+                                  help="As for the show subcommand (default 0.02).")
+    calibrate_parser.add_argument("-j", "--processes", type=int,
+                                  help="The number of processes to use to check the answers first "
+                                       "(default one per CPU).")
+
+    verify_parser = subparsers.add_parser(
+        "verify",
+        description="Checks that every answer solves the questions it's marked as solving, in parallel. "
+                    "Exits with status 1 if any answer failed, timed out or crashed.")
+    verify_parser.set_defaults(func=verify_command)
+    verify_parser.add_argument("-j", "--processes", type=int,
+                               help="The number of processes to use (default one per CPU).")
+    verify_parser.add_argument("--timeout", type=float, default=10.0, metavar="SECONDS",
+                               help="Give up on an answer that takes longer than this (default 10).")
+    verify_parser.add_argument("--all", action="store_true", dest="full",
+                               help="Check every pair again, including those where nothing has changed "
+                                    "since they last passed or failed.")
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        description="Keeps funcfinder loaded in a server process listening on a socket in the cache directory. "
+                    "While it runs, other funcfinder commands are run by the server, which saves importing "
+                    "and loading everything each time. The server restarts itself when the source changes.")
+    serve_parser.set_defaults(func=serve_command)
+
+    batch_parser = subparsers.add_parser(
+        "batch",
+        description="Reads find and show commands from standard input, one per line (e.g. 'show copy_dict -t'), "
+                    "and runs them all in this process, printing their results as lines of JSON as with --ndjson. "
+                    "The results of each command are followed by a line of type End with its exit status.")
+    batch_parser.set_defaults(func=batch)
 
-    args = parser.parse_args()
-    args.func(args)
+    return parser
+
+
+in_server = False
+
+
+def run(argv):
+    """
+    Runs a command line in the server.
+    """
+    global in_server
+    in_server = True
+    args = make_parser().parse_args(argv)
+    return args.func(args)
+
+
+def main():
+    args = make_parser().parse_args()
+    # The server can't read this process's standard input
+    if args.func not in (serve_command, batch) and not args.no_daemon:
+        status = forward(sys.argv[1:])
+        if status is not None:
+            return status
+    return args.func(args)
 
 
 if __name__ == "__main__":
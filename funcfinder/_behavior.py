@@ -0,0 +1,350 @@
+"""
+Fingerprints of what answers do, so that answers can be found from examples of inputs and outputs
+without running every answer on every example.
+
+Every answer is run once on a fixed bank of canonical inputs for its number of arguments, and a hash of what it
+returned (or the type of exception it raised) for each input is stored in the cache directory. Examples whose
+inputs are in the bank are checked by comparing the hashes of the expected outputs, and the answers that fit
+those are only run on the rest of the examples. What's known about an answer is forgotten when its source changes.
+
+Each output has two hashes. The loose hash treats all sequences and iterators alike, and ints and floats with the
+same value alike, so that an example written as a literal list matches an answer returning a tuple or a generator.
+The strict hash also includes the types of everything.
+"""
+
+import ast
+import copy
+from collections import Iterable, Iterator, Mapping, OrderedDict
+import hashlib
+from itertools import islice, permutations, product
+import re
+
+import funcfinder.answers
+from funcfinder._cache import load_json, save_json
+from funcfinder._catalog import answers_by_arity, get_answer_catalog
+from funcfinder._parallel import sandboxed_map, restart_timer, DONE
+from funcfinder._signatures import permute, type_signature
+
+_FILENAME = "behavior.json"
+
+# Changes whenever the way outputs are normalized changes, making the stored hashes useless
+_VERSION = 1
+
+# Only this many elements of an iterable output are looked at, in case it's infinite
+_MAX_ITEMS = 1000
+
+_VALUES = [0, 1, 2, 3, -4, 2.5, True, None, "", "a", "abc", "a{}b",
+           [], [1], [3, 1, 2], ["b", "a"], [[1, 2], [3, 4]], [[1], [], [2, 3]], (1, 2),
+           {}, {"a": 1, "b": 0}, set([1, 2]), len, str]
+
+# Fewer values for more arguments, since every combination is tried
+_PAIR_VALUES = [0, 1, 2, 3, -4, "abc", "a{}b", [], [1, 2], [3, 1, 2], ["b", "a"], {"a": 1, "b": 0}, len]
+
+_MANY_VALUES = [0, 1, "ab", [1, 2], len]
+
+_MAX_INPUTS = 500
+
+_MISSING = object()
+
+_index = None
+
+
+def canonical_inputs(arity):
+    """
+    The bank of argument tuples that answers taking arity arguments are run on.
+    """
+    if arity == 0:
+        return [()]
+    values = {1: _VALUES, 2: _PAIR_VALUES}.get(arity, _MANY_VALUES)
+    return list(islice(product(values, repeat=arity), _MAX_INPUTS))
+
+
+def input_key(args):
+    return repr(args)
+
+
+def _normalize(value, strict):
+    """
+    A representation of value which compares and prints the same for equivalent values (see the module docstring).
+    """
+    if isinstance(value, basestring):
+        return (type(value).__name__ if strict else "str"), value
+    if isinstance(value, bool) or value is None:
+        return "const", value
+    if isinstance(value, (int, long, float)):
+        if strict:
+            return type(value).__name__, repr(value)
+        return "num", int(value) if isinstance(value, float) and value.is_integer() else value
+    if isinstance(value, Mapping):
+        items = [(_normalize(k, strict), _normalize(v, strict)) for k, v in islice(value.iteritems(), _MAX_ITEMS)]
+        if not strict or type(value) is dict:
+            items.sort()
+        return (type(value).__name__ if strict else "map"), items
+    if isinstance(value, (set, frozenset)):
+        return (type(value).__name__ if strict else "set"), sorted(_normalize(x, strict) for x in value)
+    if isinstance(value, Iterable):
+        kind = "seq"
+        if strict:
+            kind = "iterator" if isinstance(value, Iterator) else type(value).__name__
+        iterator = iter(value)
+        items = [_normalize(x, strict) for x in islice(iterator, _MAX_ITEMS)]
+        if next(iterator, _MISSING) is not _MISSING:
+            items.append("...")
+        return kind, items
+    if callable(value):
+        return "callable", None
+    # Leave out memory addresses, which are different every time
+    return type(value).__name__, re.sub(r" at 0x[0-9a-fA-F]+", "", repr(value))
+
+
+def normalize(value):
+    return _normalize(value, False)
+
+
+def _hash(normalized):
+    return hashlib.sha1(repr(normalized)).hexdigest()[:16]
+
+
+def output_hash(value):
+    """
+    The loose hash of an output, as stored in the index.
+    """
+    return _hash(normalize(value))
+
+
+def _call(function, args):
+    """
+    Calls function with a copy of args. An iterator result is turned into a list of (up to one more than)
+    the number of items that are normalized, so that it can be normalized more than once.
+    """
+    result = function(*copy.deepcopy(args))
+    if isinstance(result, Iterator):
+        return list(islice(result, _MAX_ITEMS + 1)), True
+    return result, False
+
+
+def _outcome_hashes(function, args):
+    try:
+        result, is_iterator = _call(function, args)
+        strict = _normalize(result, True)
+        if is_iterator:
+            strict = "iterator", strict[1]
+        return [_hash(_normalize(result, False)), _hash(strict)]
+    except Exception as e:
+        return [_hash(("raises", type(e).__name__))] * 2
+
+
+def _run_answer((answer_name, inputs)):
+    answer = funcfinder.answers.functions[answer_name]
+    hashes = []
+    for args in inputs:
+        restart_timer()
+        hashes.append(_outcome_hashes(answer, args))
+    return hashes
+
+
+class BehaviorIndex(object):
+    """
+    The hashes of the outputs of answers on inputs, stored in the cache directory.
+    """
+
+    def __init__(self):
+        stored = load_json(_FILENAME, {})
+        self._answers = stored.get("answers", {}) if stored.get("version") == _VERSION else {}
+        self._changed = False
+
+    def outputs(self, answer_name):
+        """
+        Maps input keys to [loose hash, strict hash] for the answer, or returns None if the answer couldn't be
+        run on the inputs (e.g. it timed out) or hasn't been yet.
+        """
+        record = self._answers.get(answer_name)
+        if record is None or record["hash"] != get_answer_catalog()[answer_name]["hash"]:
+            return None
+        return record["outputs"]
+
+    def update(self, answer_names, processes=None, timeout=1.0):
+        """
+        Runs each answer on whichever of the canonical inputs for its arity it hasn't been run on yet, in parallel
+        (see sandboxed_map). An answer which takes longer than timeout seconds for any single input isn't run on
+        any more inputs until its source changes.
+        """
+        catalog = get_answer_catalog()
+        work = []
+        for name in answer_names:
+            entry = catalog[name]
+            record = self._answers.get(name)
+            if record is None or record["hash"] != entry["hash"]:
+                record = self._answers[name] = dict(hash=entry["hash"], outputs={})
+                self._changed = True
+            if record["outputs"] is None:
+                continue
+            inputs = [args for args in canonical_inputs(entry["argcount"]) if input_key(args) not in record["outputs"]]
+            if inputs:
+                work.append((name, inputs))
+
+        if not work:
+            return
+        for name in set(name for name, _ in work):
+            _ = funcfinder.answers.functions[name]
+        for (name, inputs), (status, hashes) in zip(work, sandboxed_map(_run_answer, work, processes, timeout)):
+            outputs = self._answers[name]["outputs"]
+            if status == DONE:
+                outputs.update((input_key(args), args_hashes) for args, args_hashes in zip(inputs, hashes))
+            else:
+                self._answers[name]["outputs"] = None
+        self._changed = True
+
+    def save(self):
+        if self._changed:
+            save_json(_FILENAME, dict(version=_VERSION, answers=self._answers))
+            self._changed = False
+
+
+def get_behavior_index():
+    global _index
+    if _index is None:
+        _index = BehaviorIndex()
+    return _index
+
+
+def parse_example(text):
+    """
+    Parses an example written as 'ARGUMENTS -> RESULT' where the arguments are separated by commas,
+    e.g. '[[1, 2], [3, 4]] -> [[1, 3], [2, 4]]' or '4, 2 -> True'. Both sides must be Python literals.
+    Returns an (arguments tuple, result) pair.
+    """
+    parts = text.split("->")
+    for i in xrange(1, len(parts)):
+        try:
+            args = ast.literal_eval("(%s,)" % "->".join(parts[:i]))
+            result = ast.literal_eval("->".join(parts[i:]).strip())
+        except (SyntaxError, ValueError):
+            continue
+        return args, result
+    raise ValueError("Examples must be written as 'ARGUMENTS -> RESULT' using Python literals, not %r" % text)
+
+
+def check_arity(examples):
+    """
+    Returns the number of arguments in the examples, or raises a ValueError if they don't all have the same number.
+    """
+    arities = set(len(args) for args, _ in examples)
+    if len(arities) != 1:
+        raise ValueError("All examples must have the same number of arguments")
+    return arities.pop()
+
+
+def _check_candidate((answer_name, candidate_permutations)):
+    """
+    Returns the first of the candidate permutations, as (index permutation, examples with their arguments permuted)
+    pairs, for which the answer gives the expected result for every example, or None.
+    """
+    answer = funcfinder.answers.functions[answer_name]
+    for index_permutation, examples in candidate_permutations:
+        for args, expected in examples:
+            restart_timer()
+            try:
+                result, _ = _call(answer, args)
+                if normalize(result) != normalize(expected):
+                    break
+            except Exception:
+                break
+        else:
+            return index_permutation
+    return None
+
+
+def _crashing_signatures(inputs, outputs):
+    """
+    The type signatures (see _signatures.type_signature) of the canonical inputs which all made the answer
+    with these outputs crash (raising a TypeError or AttributeError, like the crashes ask learns from).
+    """
+    crash_hashes = set(_hash(("raises", name)) for name in ("TypeError", "AttributeError"))
+    crashed = {}
+    for args in inputs:
+        hashes = outputs.get(input_key(args))
+        if hashes is not None:
+            signature = type_signature(args)
+            crashed[signature] = crashed.get(signature, True) and hashes[0] in crash_hashes
+    return set(signature for signature, always in crashed.iteritems() if always)
+
+
+def example_matches(examples, processes=None, timeout=1.0):
+    """
+    Yields (answer name, index permutation) for each answer that gives the expected result for every example,
+    with its arguments in the first order that does, like asking a question. examples is a list of
+    (arguments tuple, result) pairs which all have the same number of arguments (see check_arity).
+
+    The index rules out an answer with an order of arguments if it gave a different result for an example whose
+    inputs are in the canonical bank, or crashed on every input in the bank with the same types as an example.
+    The remaining orders are only then tried by running the answer on the other examples, stopping at the first
+    order that gives every expected result.
+    """
+    arity = check_arity(examples)
+    index_permutations = list(permutations(range(arity)))
+    names = answers_by_arity().get(arity, [])
+
+    index = get_behavior_index()
+    index.update(names, processes, timeout)
+    index.save()
+
+    inputs = canonical_inputs(arity)
+    expected_hashes = [output_hash(expected) for _, expected in examples]
+    candidates = []
+    for name in names:
+        # Answers that couldn't be indexed are run on every example
+        outputs = index.outputs(name) or {}
+        crashing_signatures = _crashing_signatures(inputs, outputs)
+        candidate_permutations = []
+        for index_permutation in index_permutations:
+            unchecked = []
+            for (args, expected), expected_hash in zip(examples, expected_hashes):
+                args = permute(args, index_permutation)
+                hashes = outputs.get(input_key(args))
+                if hashes is None:
+                    if type_signature(args) in crashing_signatures:
+                        break
+                    unchecked.append((args, expected))
+                elif hashes[0] != expected_hash:
+                    break
+            else:
+                candidate_permutations.append((index_permutation, unchecked))
+        if candidate_permutations:
+            candidates.append((name, candidate_permutations))
+
+    # An answer whose first remaining order is confirmed by the index alone doesn't need to be run
+    to_run = [candidate for candidate in candidates if candidate[1][0][1]]
+    results = sandboxed_map(_check_candidate, to_run, processes, timeout)
+    for name, candidate_permutations in candidates:
+        index_permutation, unchecked = candidate_permutations[0]
+        if unchecked:
+            status, index_permutation = next(results)
+            if status != DONE:
+                continue
+        if index_permutation is not None:
+            yield name, index_permutation
+
+
+def equivalence_classes(answer_names, processes=None, timeout=1.0):
+    """
+    Groups the answers which behave the same, i.e. give the same strict hashes for all the canonical inputs
+    of their arity. Returns a list of lists of names in the order given, including answers on their own.
+    Answers which give the same result for every input (usually because they always fail, e.g. when they need a
+    library that isn't installed) and answers that couldn't be run on the inputs are never grouped.
+    """
+    index = get_behavior_index()
+    index.update(answer_names, processes, timeout)
+    index.save()
+
+    catalog = get_answer_catalog()
+    classes = OrderedDict()
+    for name in answer_names:
+        key = name
+        outputs = index.outputs(name)
+        if outputs is not None:
+            hashes = tuple(outputs[input_key(args)][1] for args in canonical_inputs(catalog[name]["argcount"]))
+            if len(set(hashes)) > 1:
+                key = catalog[name]["argcount"], hashes
+        classes.setdefault(key, []).append(name)
+    return classes.values()
@@ -0,0 +1,73 @@
+import json
+import os
+import tempfile
+
+
+def cache_dir():
+    """
+    The directory where funcfinder keeps its caches and stored results.
+    It can be changed with the environment variable FUNCFINDER_CACHE_DIR.
+    """
+    return (os.environ.get("FUNCFINDER_CACHE_DIR") or
+            os.path.join(os.path.expanduser("~"), ".cache", "funcfinder"))
+
+
+def cache_path(filename):
+    return os.path.join(cache_dir(), filename)
+
+
+def load_json(filename, default=None):
+    try:
+        with open(cache_path(filename)) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return default
+
+
+def save_json(filename, value):
+    """
+    Atomically replaces the contents of the file. Caches are only an optimisation, so failing to write
+    (e.g. because the home directory is read-only) is silently ignored.
+    """
+    directory = cache_dir()
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        fd, temp_path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(fd, "w") as f:
+            json.dump(value, f)
+        os.rename(temp_path, cache_path(filename))
+    except (IOError, OSError):
+        pass
+
+
+def load_json_lines(filename):
+    """
+    Returns the values stored one per line in the file, skipping any line that can't be parsed
+    (such as one left incomplete by an interrupted write).
+    """
+    values = []
+    try:
+        with open(cache_path(filename)) as f:
+            for line in f:
+                try:
+                    values.append(json.loads(line))
+                except ValueError:
+                    pass
+    except IOError:
+        pass
+    return values
+
+
+def append_json_lines(filename, values):
+    """
+    Adds the values to the end of the file, one per line. Like save_json, failing to write is silently ignored.
+    """
+    directory = cache_dir()
+    try:
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(cache_path(filename), "a") as f:
+            f.write("".join(json.dumps(value) + "\n" for value in values))
+    except (IOError, OSError):
+        pass
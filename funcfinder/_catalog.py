@@ -0,0 +1,164 @@
+"""
+A persistent record of the questions and answers in the repository which can be read without importing them.
+
+For every module in a package the catalog stores the names, docstrings, source locations, source hashes,
+`solves` links, `ask_ignore` marks and argument counts of its functions. It is saved in the cache directory and
+a module is only imported again when its file has changed (by modification time and size).
+"""
+
+from collections import OrderedDict, Mapping
+import hashlib
+from importlib import import_module
+import inspect
+import os
+from pkgutil import walk_packages
+
+from funcfinder._cache import load_json, save_json
+from funcfinder._imports import module_functions, source_lines
+
+_CATALOG_VERSION = 2
+
+_catalogs = {}
+
+
+def _package_path(package):
+    return [os.path.join(os.path.dirname(os.path.abspath(__file__)), package)]
+
+
+def _module_file(loader, module_name):
+    return loader.find_module(module_name).get_filename()
+
+
+def _file_stamp(filename):
+    stat = os.stat(filename)
+    return [stat.st_mtime, stat.st_size]
+
+
+def _entry(function):
+    lines, line = source_lines(function)
+    return dict(
+        module=function.__module__,
+        doc=function.__doc__,
+        file=os.path.abspath(inspect.getsourcefile(function)),
+        line=line,
+        argcount=function.func_code.co_argcount,
+        solves=[question.__name__ for question in getattr(function, "solved_questions", ())],
+        ask_ignore=getattr(function, "ask_ignore", False),
+        hash=hashlib.sha1("".join(lines)).hexdigest())
+
+
+def get_catalog(package_path, package_name):
+    """
+    Returns an OrderedDict mapping the name of each function in the package to its catalog entry,
+    importing only the modules that have changed since the catalog was last saved.
+    """
+    try:
+        return _catalogs[package_name]
+    except KeyError:
+        pass
+
+    cache_filename = "catalog-%s.json" % package_name
+    cached = load_json(cache_filename, {})
+    if cached.get("version") != _CATALOG_VERSION:
+        cached = {}
+    cached_modules = cached.get("modules", {})
+
+    modules = OrderedDict()
+    changed = False
+    for loader, module_name, ispkg in walk_packages(package_path, prefix=package_name + "."):
+        stamp = _file_stamp(_module_file(loader, module_name))
+        module_info = cached_modules.get(module_name)
+        if module_info is None or module_info["stamp"] != stamp:
+            module = import_module(module_name)
+            functions = sorted(([name, _entry(function)] for name, function in module_functions(module)),
+                               key=lambda (_, entry): entry["line"])
+            module_info = dict(stamp=stamp, functions=functions)
+            changed = True
+        modules[module_name] = module_info
+
+    if changed or len(modules) != len(cached_modules):
+        save_json(cache_filename, dict(version=_CATALOG_VERSION, modules=modules))
+
+    result = OrderedDict()
+    for module_name, module_info in modules.iteritems():
+        for name, entry in module_info["functions"]:
+            name = str(name)
+            if name in result:
+                raise NameError("The name %s has been defined in both %s and %s." %
+                                (name, module_name, result[name]["module"]))
+            result[name] = entry
+
+    _catalogs[package_name] = result
+    return result
+
+
+def get_question_catalog():
+    return get_catalog(_package_path("questions"), "funcfinder.questions")
+
+
+def get_answer_catalog():
+    return get_catalog(_package_path("answers"), "funcfinder.answers")
+
+
+def is_repository_question(question):
+    """
+    Whether question is the question of that name in the repository, rather than, say, a question with the same name
+    defined in a script. Only then can anything stored under its name be used for it.
+    """
+    import funcfinder.questions
+
+    return funcfinder.questions.functions.get(question.__name__) is question
+
+
+def answer_names(question_name):
+    """
+    Names of the answers marked as solving the question, in the order they are defined.
+    """
+    return [name for name, entry in get_answer_catalog().iteritems() if question_name in entry["solves"]]
+
+
+def answers_by_arity():
+    """
+    Maps each number of arguments to the names of the answers taking that many arguments,
+    excluding answers marked with ask_ignore.
+    """
+    result = {}
+    for name, entry in get_answer_catalog().iteritems():
+        if not entry["ask_ignore"]:
+            result.setdefault(entry["argcount"], []).append(name)
+    return result
+
+
+class LazyFunctions(Mapping):
+    """
+    Maps the names of the functions in a package to the functions themselves.
+    The catalog says which module defines each name, and that module alone is imported
+    the first time one of its functions is accessed.
+    """
+
+    def __init__(self, package_path, package_name):
+        self._package_path = package_path
+        self._package_name = package_name
+        self._functions = {}
+
+    def _catalog(self):
+        return get_catalog(self._package_path, self._package_name)
+
+    def __getitem__(self, name):
+        try:
+            return self._functions[name]
+        except KeyError:
+            pass
+        entry = self._catalog()[name]
+        function = getattr(import_module(entry["module"]), name)
+        self._functions[name] = function
+        return function
+
+    def __iter__(self):
+        return iter(self._catalog())
+
+    def __len__(self):
+        return len(self._catalog())
+
+    def __contains__(self, name):
+        return name in self._catalog()
@@ -0,0 +1,197 @@
+"""
+A server that keeps funcfinder loaded between commands, so that the questions and answers are only imported and
+their sources only parsed once, rather than by every `funcfinder` command.
+
+The server listens on a Unix socket in the cache directory and handles one command at a time. A client sends the
+command line arguments as a JSON line, and the server replies with JSON lines of the form {"out": text} and
+{"err": text} for what the command prints, ending with {"exit": status}. If any funcfinder source file has changed
+since the server started, it closes the connection without replying and restarts itself, and the client runs the
+command itself.
+"""
+
+import json
+import os
+import socket
+import sys
+import traceback
+
+import funcfinder.answers
+import funcfinder.questions
+from funcfinder._cache import cache_dir, cache_path
+
+_SOCKET_FILENAME = "daemon.sock"
+
+# The module level caches of stored results. These are small and can be changed by commands run without the server,
+# so they are read again for every command.
+_STORES = [("funcfinder._verify", "_store"),
+           ("funcfinder._rejections", "_rejection_stats"),
+           ("funcfinder._signatures", "_argument_types"),
+           ("funcfinder._history", "_history"),
+           ("funcfinder._behavior", "_index")]
+
+
+def socket_path():
+    return cache_path(_SOCKET_FILENAME)
+
+
+def _send(connection, message):
+    connection.sendall(json.dumps(message) + "\n")
+
+
+class _Stream(object):
+    """
+    A file-like object which sends everything written to it to the client, under the given key.
+    Nothing is buffered, so processes forked while a command runs can't send anything twice.
+    """
+
+    def __init__(self, connection, key):
+        self._connection = connection
+        self._key = key
+
+    def write(self, text):
+        if text:
+            if isinstance(text, str):
+                text = text.decode("utf-8", "replace")
+            _send(self._connection, {self._key: text})
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+
+def _source_stamps():
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    stamps = {}
+    for directory, _, filenames in os.walk(package_dir):
+        for filename in filenames:
+            if filename.endswith(".py"):
+                path = os.path.join(directory, filename)
+                stat = os.stat(path)
+                stamps[path] = (stat.st_mtime, stat.st_size)
+    return stamps
+
+
+def _reset_stores():
+    for module_name, attribute in _STORES:
+        module = sys.modules.get(module_name)
+        if module is not None:
+            setattr(module, attribute, None)
+
+
+def _handle(connection, request, run_command):
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout = _Stream(connection, "out")
+    sys.stderr = _Stream(connection, "err")
+    try:
+        _reset_stores()
+        try:
+            status = run_command([arg.encode("utf-8") for arg in json.loads(request)["argv"]])
+        except SystemExit as e:
+            status = e.code
+        except Exception:
+            traceback.print_exc()
+            status = 1
+    finally:
+        sys.stdout, sys.stderr = stdout, stderr
+    if not isinstance(status, int):
+        status = 0 if status is None else 1
+    _send(connection, dict(exit=status))
+
+
+def serve(run_command):
+    """
+    Runs the server until interrupted. run_command takes a list of command line arguments, runs the command,
+    and returns the exit status.
+    """
+    path = socket_path()
+    if forward(None) is not None:
+        print "A funcfinder server is already running at %s" % path
+        return 1
+    if os.path.exists(path):
+        os.remove(path)
+    if not os.path.isdir(cache_dir()):
+        os.makedirs(cache_dir())
+
+    # Load everything before the first command, as far as possible without running anything
+    for name in funcfinder.questions.functions:
+        _ = funcfinder.questions.functions[name]
+    for name in funcfinder.answers.functions:
+        _ = funcfinder.answers.functions[name]
+    stamps = _source_stamps()
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(5)
+    print "Serving funcfinder commands at %s (press Ctrl+C to stop)" % path
+    restart = False
+    try:
+        while not restart:
+            connection, _ = server.accept()
+            try:
+                request = connection.makefile("r").readline()
+                if _source_stamps() != stamps:
+                    print "The source has changed, restarting..."
+                    restart = True
+                elif request == "ping\n":
+                    connection.sendall("pong\n")
+                else:
+                    _handle(connection, request, run_command)
+            except socket.error:
+                pass
+            finally:
+                connection.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        os.remove(path)
+
+    if restart:
+        os.execv(sys.executable, [sys.executable, "-m", "funcfinder", "serve"])
+
+
+def forward(argv):
+    """
+    Runs the command line arguments argv in the server, printing what it prints, and returns the exit status,
+    or None if there's no server or it couldn't run the command. If argv is None, just checks for a server.
+    """
+    path = socket_path()
+    if not os.path.exists(path):
+        return None
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(path)
+    except socket.error:
+        return None
+
+    try:
+        connection_file = connection.makefile("rw")
+        if argv is None:
+            connection_file.write("ping\n")
+            connection_file.flush()
+            return 0 if connection_file.readline() == "pong\n" else None
+        connection_file.write(json.dumps(dict(argv=argv)) + "\n")
+        connection_file.flush()
+
+        received = False
+        for line in connection_file:
+            received = True
+            message = json.loads(line)
+            if "exit" in message:
+                return message["exit"]
+            stream = sys.stdout if "out" in message else sys.stderr
+            stream.write((message.get("out") or message.get("err")).encode("utf-8"))
+        if received:
+            print >> sys.stderr, "The funcfinder server stopped before the command finished."
+            return 1
+        return None
+    except socket.error:
+        return None
+    finally:
+        connection.close()
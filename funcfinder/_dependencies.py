@@ -0,0 +1,63 @@
+import sys
+
+
+class CodeDetector(object):
+    """
+    Finds the questions and answers that a question and an answer depend on, by collecting the code of every
+    Python function called while the question runs. This uses a profiling hook, which only sees calls,
+    rather than a tracer which would see every line.
+    Results are cached per pair of question and answer.
+    """
+
+    _codes_cache = {}
+
+    def __init__(self):
+        self.codes = set()
+
+    def _profile(self, frame, event, _arg):
+        if event == "call":
+            self.codes.add(frame.f_code)
+
+    @staticmethod
+    def _key(question, answer):
+        return question.func_code, getattr(answer, "__wrapped__", answer).func_code
+
+    @classmethod
+    def run(cls, question, answer):
+        """
+        Calls question(answer), letting any exception propagate, and caches the code called.
+        """
+        detector = cls()
+        previous_profile = sys.getprofile()
+        sys.setprofile(detector._profile)
+        try:
+            question(answer)
+        finally:
+            sys.setprofile(previous_profile)
+            cls._codes_cache[cls._key(question, answer)] = detector.codes
+
+    @classmethod
+    def detect(cls, question, answer, include_questions):
+        key = cls._key(question, answer)
+        if key not in cls._codes_cache:
+            try:
+                cls.run(question, answer)
+            except Exception:
+                pass
+
+        codes = set(cls._codes_cache[key])
+        codes.difference_update(key)
+        codes.discard(answer.func_code)
+
+        filtered_codes = set()
+
+        for code in codes:
+            filename = code.co_filename
+
+            def from_package(package):
+                return ("funcfinder/%s/" % package) in filename and not filename.endswith("__init__.py")
+
+            # noinspection PyTypeChecker
+            if from_package("answers") or include_questions and from_package("questions"):
+                filtered_codes.add(code)
+        return filtered_codes
@@ -0,0 +1,164 @@
+"""
+Calls whichever correct answer to a question is fastest for the input in hand.
+
+calibrate checks which answers to a question pass it, times them on inputs of increasing size (if the question
+declares how to generate them with `scaling`) and stores a dispatch table in the cache directory. The table lists
+the sizes (lengths of the first argument) at which the fastest answer changes, and the fastest answer from each
+of those sizes up. best reads the table and returns a function which only has to find the length of its first
+argument and call the right answer directly. A table is only used while the sources of the question and its
+answers, the version of Python and the machine are the same as when it was made.
+"""
+
+from bisect import bisect_right
+import hashlib
+import math
+
+import funcfinder.answers
+import funcfinder.questions
+from funcfinder._cache import load_json, save_json
+from funcfinder._catalog import answer_names, get_answer_catalog, get_question_catalog
+from funcfinder._history import machine_fingerprint, python_version
+from funcfinder._timing import benchmark, record_calls, replay_calls, time_scaling, _CROSSOVER_MARGIN
+from funcfinder._verify import verify_pairs, PASSED
+
+_FILENAME = "dispatch.json"
+
+
+def _question_name(question):
+    name = getattr(question, "__name__", question)
+    if name not in get_question_catalog():
+        raise KeyError("No question with name %s found" % name)
+    return name
+
+
+def _sources_hash(question_name):
+    answer_catalog = get_answer_catalog()
+    parts = ["questions:%s:%s" % (question_name, get_question_catalog()[question_name]["hash"])]
+    parts += ["answers:%s:%s" % (name, answer_catalog[name]["hash"]) for name in answer_names(question_name)]
+    return hashlib.sha1("\n".join(parts)).hexdigest()
+
+
+def _input_size(args):
+    try:
+        return len(args[0])
+    except (IndexError, TypeError):
+        return None
+
+
+def _fastest_by_size(question, answers, budget, precision):
+    """
+    A list of (size, answer name) pairs, meaning the answer is the fastest from that size
+    until the next size in the list.
+    """
+    sizes, times_by_name = time_scaling(question, answers, budget, precision)
+    lengths = [_input_size(question.scaling_inputs(size)) for size in sizes]
+    if None in lengths:
+        # The size of an input can't be told when calling the answer, so only the largest inputs matter
+        return [(0, min(times_by_name, key=lambda name: times_by_name[name][-1]))]
+
+    table = []
+    for i, length in enumerate(lengths):
+        fastest = min(times_by_name, key=lambda name: times_by_name[name][i])
+        if not table:
+            table.append((0, fastest))
+        elif times_by_name[fastest][i] < times_by_name[table[-1][1]][i] * (1 - _CROSSOVER_MARGIN):
+            # Switch halfway between the measured sizes on a logarithmic scale
+            table.append((int(math.ceil(math.sqrt(lengths[i - 1] * length))), fastest))
+    return table
+
+
+def _fastest(question, answers, budget, precision):
+    """
+    The name of the answer which spends the least time on the calls that the question makes to it.
+    """
+    budget /= len(answers)
+    times = {}
+    for answer in answers:
+        calls = record_calls(question, answer)
+        times[answer.__name__] = benchmark(lambda: replay_calls(answer, calls), budget, precision).median
+    return min(times, key=times.get)
+
+
+def calibrate(question, budget=2.0, precision=0.02, processes=None):
+    """
+    Makes and stores the dispatch table used by best for the question (or the name of a question)
+    and returns it, as a list of (size, answer name) pairs meaning that the answer is the fastest
+    from that length of the first argument up to the next size in the list.
+
+    Only the answers which pass the question are used (see funcfinder.verify, which is what processes is for).
+    They're timed across the sizes that the question declares with `scaling`, spending about budget seconds
+    in total, or on just the question's own inputs if it doesn't declare any.
+    """
+    question_name = _question_name(question)
+    question = funcfinder.questions.functions[question_name]
+    pairs = [(question_name, name) for name in answer_names(question_name)]
+    answers = [funcfinder.answers.functions[verification.answer]
+               for verification, _ in verify_pairs(pairs, processes=processes)
+               if verification.status == PASSED]
+    if not answers:
+        raise ValueError("None of the answers to %s pass the question" % question_name)
+
+    if len(answers) == 1:
+        table = [(0, answers[0].__name__)]
+    elif hasattr(question, "scaling_inputs"):
+        table = _fastest_by_size(question, answers, budget, precision)
+    else:
+        table = [(0, _fastest(question, answers, budget, precision))]
+
+    tables = load_json(_FILENAME, {})
+    tables[question_name] = dict(hash=_sources_hash(question_name),
+                                 python=python_version(),
+                                 machine=machine_fingerprint(),
+                                 table=table)
+    save_json(_FILENAME, tables)
+    return table
+
+
+def dispatch_table(question):
+    """
+    The stored dispatch table for the question (see calibrate), or None if there isn't one for its current sources
+    that was made with this version of Python on this machine.
+    """
+    question_name = _question_name(question)
+    entry = load_json(_FILENAME, {}).get(question_name)
+    if (entry is None or entry["hash"] != _sources_hash(question_name) or
+            entry["python"] != python_version() or entry["machine"] != machine_fingerprint()):
+        return None
+    return [(size, str(name)) for size, name in entry["table"]]
+
+
+def describe_table(table):
+    if len(table) == 1:
+        return "%s for every size" % table[0][1]
+    return ", ".join(["%s below a size of %i" % (table[0][1], table[1][0])] +
+                     ["%s from %i" % (name, size) for size, name in table[1:]])
+
+
+def best(question, budget=2.0, precision=0.02):
+    """
+    Returns a function which calls whichever answer to the question (or the name of a question) is fastest
+    for the length of its first argument, according to the dispatch table made by calibrate.
+    If there's no table for the current sources of the question and its answers, calibrate is called first
+    with the given budget and precision, which takes a while, so it's best to calibrate in advance.
+
+    Arguments without a length go to the answer which is fastest for the largest inputs.
+    If one answer is always the fastest, that answer itself is returned.
+    """
+    question_name = _question_name(question)
+    table = dispatch_table(question_name) or calibrate(question_name, budget, precision)
+    answers = [funcfinder.answers.functions[name] for _, name in table]
+    if len(answers) == 1:
+        return answers[0]
+    sizes = [size for size, _ in table[1:]]
+    largest = answers[-1]
+
+    def best_answer(*args):
+        try:
+            size = len(args[0])
+        except TypeError:
+            return largest(*args)
+        return answers[bisect_right(sizes, size)](*args)
+
+    best_answer.__name__ = "best_" + question_name
+    best_answer.__doc__ = "Calls %s." % describe_table(table)
+    return best_answer
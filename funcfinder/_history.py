@@ -0,0 +1,139 @@
+"""
+A history of the times measured for answers, so that runs on different versions of Python can be compared.
+
+Every time the answers to a question are timed together, one row per answer is appended to a JSON lines file in the
+cache directory. Rows record the question, the answer, the hashes of both of their sources, the Python version and
+a fingerprint of the machine. Absolute times vary with the load on the machine, so runs are compared by the
+relative speeds of the answers within each run, i.e. each answer's time divided by the fastest answer's time.
+"""
+
+from collections import namedtuple
+import hashlib
+from multiprocessing import cpu_count
+import platform
+import time
+
+from funcfinder._cache import append_json_lines, load_json_lines
+from funcfinder._catalog import get_answer_catalog, get_question_catalog, is_repository_question
+
+_FILENAME = "benchmarks.jsonl"
+
+_history = None
+
+# A change in relative speed beyond the threshold. Speeds are times relative to the fastest answer in the run.
+SpeedChange = namedtuple("SpeedChange", "answer baseline_speed speed")
+
+# The result of comparing the latest run of a question against the baseline run, which is None if there isn't one.
+# baseline_fastest and fastest are the names of the fastest answers among those timed in both runs.
+Comparison = namedtuple("Comparison", "question baseline baseline_fastest fastest changes")
+
+
+def python_version():
+    return "%s %s" % (platform.python_implementation(), platform.python_version())
+
+
+def machine_fingerprint():
+    """
+    A short hash identifying the hardware, since times from different machines can't be compared.
+    """
+    description = "|".join(map(str, [platform.node(), platform.machine(), platform.processor(), cpu_count()]))
+    return hashlib.sha1(description).hexdigest()[:12]
+
+
+def _relative_speeds(times):
+    fastest = min(times.itervalues())
+    return dict((answer, t / fastest) for answer, t in times.iteritems())
+
+
+class BenchmarkHistory(object):
+    def __init__(self):
+        self._rows = None
+
+    def rows(self):
+        if self._rows is None:
+            self._rows = load_json_lines(_FILENAME)
+        return self._rows
+
+    def record(self, question, timings):
+        """
+        timings is a list of (answer, whole question Timing, answer only Timing) for the answers to the question
+        that were timed together. Questions and answers outside the repository aren't recorded
+        since there's nothing to compare them with later, even if they have the same names as ones inside it.
+        """
+        question_catalog = get_question_catalog()
+        answer_catalog = get_answer_catalog()
+        name = question.__name__
+        if not is_repository_question(question):
+            return
+        run = "%.6f" % time.time()
+        rows = [dict(run=run,
+                     question=name,
+                     question_hash=question_catalog[name]["hash"],
+                     answer=answer.__name__,
+                     answer_hash=answer_catalog[answer.__name__]["hash"],
+                     python=python_version(),
+                     machine=machine_fingerprint(),
+                     median=timing.median,
+                     minimum=timing.minimum,
+                     answer_median=answer_timing.median,
+                     answer_minimum=answer_timing.minimum,
+                     precise=timing.precise and answer_timing.precise)
+                for answer, timing, answer_timing in timings
+                if answer.__name__ in answer_catalog]
+        if len(rows) > 1:
+            append_json_lines(_FILENAME, rows)
+            self.rows().extend(rows)
+
+    def _runs(self, question_name):
+        """
+        The rows for the question on this machine, grouped by run, oldest first.
+        Rows from older versions of the question are left out.
+        """
+        question_hash = get_question_catalog()[question_name]["hash"]
+        machine = machine_fingerprint()
+        runs = {}
+        for row in self.rows():
+            if (row["question"], row["question_hash"], row["machine"]) == (question_name, question_hash, machine):
+                runs.setdefault(row["run"], []).append(row)
+        return [runs[run] for run in sorted(runs)]
+
+    def compare(self, question_name, threshold, baseline_python=None):
+        """
+        Compares the latest run of the question with the most recent earlier run (on the given version of Python,
+        if any) that timed at least two of the same answers with the same sources.
+        Times which weren't measured to within the requested precision are left out, since the differences
+        between them may be nothing but noise.
+        Returns a Comparison, or None if there's no run yet.
+        """
+        runs = self._runs(question_name)
+        if not runs:
+            return None
+        latest = dict((row["answer"], row) for row in runs[-1] if row["precise"])
+        for run in reversed(runs[:-1]):
+            if baseline_python is not None and run[0]["python"] != baseline_python:
+                continue
+            baseline = dict((row["answer"], row) for row in run
+                            if row["precise"] and row["answer"] in latest and
+                            row["answer_hash"] == latest[row["answer"]]["answer_hash"])
+            if len(baseline) > 1:
+                break
+        else:
+            return Comparison(question_name, None, None, None, [])
+
+        baseline_speeds = _relative_speeds(dict((answer, row["answer_median"]) for answer, row in baseline.iteritems()))
+        speeds = _relative_speeds(dict((answer, latest[answer]["answer_median"]) for answer in baseline))
+        changes = [SpeedChange(answer, baseline_speeds[answer], speeds[answer])
+                   for answer in sorted(baseline)
+                   if abs(speeds[answer] / baseline_speeds[answer] - 1) > threshold]
+        return Comparison(question_name,
+                          baseline.itervalues().next(),
+                          min(baseline_speeds, key=baseline_speeds.get),
+                          min(speeds, key=speeds.get),
+                          changes)
+
+
+def get_benchmark_history():
+    global _history
+    if _history is None:
+        _history = BenchmarkHistory()
+    return _history
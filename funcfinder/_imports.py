@@ -1,21 +1,32 @@
-from pkgutil import walk_packages
-from importlib import import_module
 import inspect
+import re
 
 
-def get_functions(package_path, package_name):
-    result = {}
-    for _loader, module_name, ispkg in walk_packages(package_path, prefix=package_name + "."):
-        module = import_module(module_name)
+def module_functions(module):
+    """
+    Returns (name, function) pairs for the public functions defined (not just imported) in the module.
+    """
+    module_name = module.__name__
 
-        def _function_predicate(value):
-            return (inspect.isfunction(value) and
-                    not value.__name__[0] == "_" and
-                    value.__module__.startswith(module_name))
+    def _function_predicate(value):
+        return (inspect.isfunction(value) and
+                not value.__name__[0] == "_" and
+                value.__module__.startswith(module_name))
 
-        for function_name, function in inspect.getmembers(module, predicate=_function_predicate):
-            if function_name in result:
-                raise NameError("The name %s has been defined in both %s and %s." %
-                                (function_name, module_name, result[function_name].__module__))
-            result[function_name] = function
-    return result
+    return inspect.getmembers(module, predicate=_function_predicate)
+
+
+def source_lines(function):
+    """
+    Like inspect.getsourcelines (for a function or a code object), except that decorators containing a lambda,
+    which inspect in Python 2 mistakes for the whole function, are handled correctly.
+    """
+    all_lines, start = inspect.findsource(function)
+    name = getattr(function, "__name__", None) or function.co_name
+    def_pattern = re.compile(r"\s*def\s+%s\b" % re.escape(name))
+    def_index = next((i for i in xrange(start, len(all_lines)) if def_pattern.match(all_lines[i])), start)
+    return all_lines[start:def_index] + inspect.getblock(all_lines[def_index:]), start + 1
+
+
+def source(function):
+    return "".join(source_lines(function)[0])
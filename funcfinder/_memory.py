@@ -0,0 +1,122 @@
+"""
+Measures the memory used by a function.
+
+tracemalloc isn't available in Python 2, so instead the function is run in a freshly forked process without
+interference. What it returns is measured exactly, by adding up sys.getsizeof over every object reachable from
+the result that didn't exist before the call. The peak can only be seen in how much the resident set size grew,
+which is too coarse to mean anything for small amounts of memory.
+"""
+
+from collections import namedtuple
+import gc
+from multiprocessing import Pipe, Process
+import os
+import sys
+
+# Sizes in bytes. objects is the number of new objects that the result keeps alive. peak is None if it was
+# too small to measure.
+MemoryUsage = namedtuple("MemoryUsage", "peak retained objects")
+
+# The resident set size only grows once the allocator runs out of memory it already has, which it requests
+# in arenas of this size, so smaller growth says nothing about how much memory was used
+_PEAK_RESOLUTION = 256 * 1024
+
+
+def _status_kilobytes(field):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (IOError, ValueError):
+        pass
+    return None
+
+
+def _reset_peak():
+    """
+    Makes the peak resident set size start again from the current size. Only possible on Linux.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except IOError:
+        return False
+
+
+def _peak_kilobytes():
+    peak = _status_kilobytes("VmHWM")
+    if peak is None:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == "darwin":
+            peak //= 1024
+    return peak
+
+
+def _current_kilobytes():
+    current = _status_kilobytes("VmRSS")
+    if current is None:
+        current = _peak_kilobytes()
+    return current
+
+
+def _reachable(roots, known):
+    """
+    Maps the ids of the objects reachable from roots (following gc.get_referents) and not in known to the objects.
+    """
+    found = {}
+    stack = list(roots)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in known or id(obj) in found:
+            continue
+        found[id(obj)] = obj
+        stack.extend(gc.get_referents(obj))
+    return found
+
+
+def _measure(function, connection):
+    gc.collect()
+    # Holding on to every existing object also stops their ids being reused by new objects
+    existing = _reachable(gc.get_objects(), {})
+    _reset_peak()
+    before = _current_kilobytes()
+
+    result = function()
+
+    peak = (_peak_kilobytes() - before) * 1024
+    new_objects = _reachable([result], existing).values()
+    retained = sum(map(sys.getsizeof, new_objects))
+    del result
+    connection.send(MemoryUsage(max(peak, retained) if peak >= _PEAK_RESOLUTION else None,
+                                retained, len(new_objects)))
+
+
+def measure_memory(function):
+    """
+    Calls function (which takes no arguments) in a child process and returns its MemoryUsage,
+    counting whatever it returns as retained. Returns None if the child process fails or fork isn't available.
+    """
+    if not hasattr(os, "fork"):
+        return None
+    receiver, sender = Pipe(duplex=False)
+    process = Process(target=_measure, args=(function, sender))
+    process.start()
+    sender.close()
+    try:
+        return receiver.recv()
+    except EOFError:
+        return None
+    finally:
+        process.join()
+        receiver.close()
+
+
+def format_bytes(num_bytes):
+    for unit, scale in (("GB", 1 << 30), ("MB", 1 << 20), ("KB", 1 << 10)):
+        if num_bytes >= scale:
+            return "%.3g %s" % (float(num_bytes) / scale, unit)
+    return "%i B" % num_bytes
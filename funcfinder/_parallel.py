@@ -0,0 +1,193 @@
+from itertools import imap
+from multiprocessing import Pipe, Pool, Process, cpu_count
+import os
+import select
+import time
+
+DONE = "done"
+TIMED_OUT = "timed out"
+OUT_OF_MEMORY = "out of memory"
+CRASHED = "crashed"
+
+_function = None
+
+# In a sandbox worker, the connection to the parent process
+_connection = None
+
+
+def _call_function(item):
+    return _function(item)
+
+
+def ordered_map(function, items, processes=None):
+    """
+    Like imap(function, items) but spread over a pool of processes (by default one per CPU),
+    still yielding the results in order.
+
+    The workers are forked with the function already in place, so only the items, the results and any exceptions
+    need to be picklable. This allows questions defined in scripts and closures over them to be used.
+    On platforms without fork the items are simply processed one at a time.
+    """
+    global _function
+
+    if processes == 1 or not hasattr(os, "fork"):
+        for result in imap(function, items):
+            yield result
+        return
+
+    _function = function
+    try:
+        pool = Pool(processes)
+    finally:
+        _function = None
+
+    try:
+        for result in pool.imap(_call_function, items):
+            yield result
+    finally:
+        pool.terminate()
+
+
+def restart_timer():
+    """
+    Called by a function running in sandboxed_map to indicate that it's starting a new trial,
+    so the timeout counts from now. Does nothing outside a sandbox.
+    """
+    if _connection is not None:
+        _connection.send(("tick", None))
+
+
+def in_sandbox():
+    return _connection is not None
+
+
+def _address_space():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (IOError, OSError, ValueError):
+        return 0
+
+
+def _limit_memory(megabytes):
+    import resource
+
+    _soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    limit = _address_space() + megabytes * 1024 * 1024
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _work(function, connection, memory_limit):
+    global _connection
+    _connection = connection
+    if memory_limit is not None:
+        _limit_memory(memory_limit)
+
+    while True:
+        try:
+            item = connection.recv()
+        except EOFError:
+            return
+        try:
+            result = (DONE, function(item))
+        except MemoryError:
+            result = (OUT_OF_MEMORY, None)
+        except Exception as e:
+            result = ("error", e)
+        try:
+            connection.send(result)
+        except Exception as e:
+            connection.send(("error", Exception("Failed to send the result back to the parent process: %r" % e)))
+
+
+class _Worker(object):
+    def __init__(self, function, memory_limit):
+        self.connection, child_connection = Pipe()
+        self.process = Process(target=_work, args=(function, child_connection, memory_limit))
+        self.process.daemon = True
+        self.process.start()
+        child_connection.close()
+        self.index = None
+        self.deadline = None
+
+    def start(self, index, item, timeout):
+        self.index = index
+        self.deadline = None if timeout is None else time.time() + timeout
+        self.connection.send(item)
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join()
+        self.connection.close()
+
+
+def sandboxed_map(function, items, processes=1, timeout=None, memory_limit=None):
+    """
+    Applies function to each item in worker processes, yielding (status, result) pairs in order.
+    status is DONE if function returned normally, TIMED_OUT if it ran for more than timeout seconds
+    (counting from the last call to restart_timer), OUT_OF_MEMORY if it used more than memory_limit extra megabytes,
+    or CRASHED if the worker died. Workers that go over their budget are killed and replaced.
+    Exceptions raised by function are re-raised here.
+
+    processes can be None to use one worker per CPU. Like ordered_map this relies on fork,
+    and the items, results and exceptions must be picklable.
+    """
+    items = list(items)
+    processes = processes or cpu_count()
+    pending = iter(enumerate(items))
+    results = {}
+    idle = []
+    busy = []
+    next_index = 0
+
+    try:
+        while next_index < len(items):
+            while next_index in results:
+                status, result = results.pop(next_index)
+                if status == "error":
+                    raise result
+                yield status, result
+                next_index += 1
+            if next_index == len(items):
+                break
+
+            while len(busy) < processes:
+                try:
+                    index, item = next(pending)
+                except StopIteration:
+                    break
+                worker = idle.pop() if idle else _Worker(function, memory_limit)
+                worker.start(index, item, timeout)
+                busy.append(worker)
+
+            deadlines = [worker.deadline for worker in busy if worker.deadline is not None]
+            wait = max(0, min(deadlines) - time.time()) if deadlines else None
+            ready, _, _ = select.select([worker.connection for worker in busy], [], [], wait)
+
+            now = time.time()
+            for worker in list(busy):
+                if worker.connection in ready:
+                    try:
+                        while worker.connection.poll():
+                            status, result = worker.connection.recv()
+                            if status == "tick":
+                                if timeout is not None:
+                                    worker.deadline = now + timeout
+                            else:
+                                results[worker.index] = (status, result)
+                                busy.remove(worker)
+                                idle.append(worker)
+                                break
+                    except (EOFError, IOError):
+                        results[worker.index] = (CRASHED, None)
+                        busy.remove(worker)
+                        worker.kill()
+                elif worker.deadline is not None and now >= worker.deadline:
+                    results[worker.index] = (TIMED_OUT, None)
+                    busy.remove(worker)
+                    worker.kill()
+    finally:
+        for worker in idle + busy:
+            worker.kill()
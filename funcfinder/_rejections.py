@@ -0,0 +1,93 @@
+import hashlib
+
+from funcfinder._cache import load_json, save_json
+from funcfinder._imports import source
+
+_FILENAME = "rejections.json"
+
+# The smoke pass of a question calls answers only as many times as needed to catch this fraction of the rejections
+# recorded for that question in the past
+_COVERAGE = 0.9
+
+# Don't trust the recorded rejections of a question until there are at least this many
+_MIN_REJECTIONS = 10
+
+_rejection_stats = None
+
+
+def question_key(question):
+    try:
+        question_source = source(question)
+    except (IOError, TypeError):
+        return question.__name__
+    return "%s:%s" % (question.__name__, hashlib.sha1(question_source).hexdigest())
+
+
+class RejectionStats(object):
+    """
+    Records, for each question, how wrong answers got rejected:
+    how many calls to the answer the question made before it failed, which line of the question failed,
+    and how long it took. Stored in the cache directory and tied to the source of the question.
+    """
+
+    def __init__(self):
+        self._stats = load_json(_FILENAME, {})
+        self._changed = False
+
+    def record(self, question, rejections):
+        """
+        rejections is a list of (number of calls, line number, seconds taken) tuples.
+        """
+        if not rejections:
+            return
+        stats = self._stats.setdefault(question_key(question), dict(calls={}, lines={}))
+        for calls, line, seconds in rejections:
+            calls = str(calls)
+            stats["calls"][calls] = stats["calls"].get(calls, 0) + 1
+            if line is not None:
+                line_stats = stats["lines"].setdefault(str(line), [0, 0])
+                line_stats[0] += 1
+                line_stats[1] += seconds
+        self._changed = True
+
+    def call_limit(self, question):
+        """
+        The number of calls to an answer after which the question rejects few other wrong answers, or None if
+        there isn't enough data yet.
+        """
+        stats = self._stats.get(question_key(question))
+        if not stats:
+            return None
+        counts = sorted((int(calls), count) for calls, count in stats["calls"].iteritems())
+        total = sum(count for _, count in counts)
+        if total < _MIN_REJECTIONS:
+            return None
+        covered = 0
+        for calls, count in counts:
+            covered += count
+            if covered >= _COVERAGE * total:
+                return calls
+
+    def most_rejecting_line(self, question):
+        """
+        Returns the line number of the question that has rejected the most answers, the number of answers it
+        rejected, and the average number of seconds the question ran before getting there, or None if nothing has
+        been recorded.
+        """
+        stats = self._stats.get(question_key(question))
+        if not stats or not stats["lines"]:
+            return None
+        line, (count, seconds) = max(stats["lines"].iteritems(), key=lambda (_, line_stats): line_stats[0])
+        return int(line), count, seconds / count
+
+    def save(self):
+        if self._changed:
+            save_json(_FILENAME, self._stats)
+            self._changed = False
+
+
+def get_rejection_stats():
+    global _rejection_stats
+    if _rejection_stats is None:
+        _rejection_stats = RejectionStats()
+    return _rejection_stats
@@ -0,0 +1,245 @@
+"""
+The results of searching, showing and asking questions, as records which can be printed as text or as JSON.
+
+find_questions, question_results and ask_results in funcfinder yield these as soon as each one is ready, and
+search_questions, show_question and ask print them with a TextPrinter. Every record is a namedtuple, and
+to_json turns one into a single line of JSON with its type under the key "type".
+"""
+
+from collections import namedtuple, OrderedDict
+import inspect
+import json
+
+from funcfinder._memory import format_bytes
+from funcfinder._parallel import TIMED_OUT, OUT_OF_MEMORY, CRASHED
+from funcfinder._timing import format_seconds, print_table
+from funcfinder._verify import PASSED
+
+QUESTION = "question"
+# An answer marked as solving the question being shown
+ANSWER = "answer"
+# An answer found by asking a question, with its parameters in the order that solves it
+SOLUTION = "solution"
+DEPENDENCY = "dependency"
+
+# A question whose name and docstring contain the search terms. doc is cleaned up with inspect.cleandoc.
+QuestionMatch = namedtuple("QuestionMatch", "name doc")
+
+# The source of a function, starting from its def line. role is one of the above.
+Source = namedtuple("Source", "role name filename line source")
+
+# Whether an answer marked as solving a question really does. status is PASSED, FAILED or SKIPPED (see _verify),
+# and traceback is None if it passed.
+AnswerResult = namedtuple("AnswerResult", "question answer status traceback")
+
+# An answer found by asking a question. permutation is the order of the question's arguments that the answer
+# takes, and solves lists the questions in the repository the answer is marked as solving.
+Solution = namedtuple("Solution", "question answer permutation solves")
+
+# The times of one of the correct answers to a question in seconds (see _timing.Timing), and its memory usage
+# in bytes (see _memory.MemoryUsage), which is None where it couldn't be measured. precise is False if the time
+# budget ran out before the times were measured to within precision.
+AnswerTiming = namedtuple("AnswerTiming", "question answer median minimum stddev runs number "
+                                          "answer_median answer_minimum peak_memory retained_memory objects "
+                                          "precise precision")
+
+# The median times of a correct answer for each input size, and the growth exponent (see _timing.growth_exponent)
+ScalingTimes = namedtuple("ScalingTimes", "question answer sizes times growth_exponent")
+
+# The answer named faster overtakes the answer named slower at about this input size
+Crossover = namedtuple("Crossover", "question faster slower size")
+
+# There's no question with this name
+NotFound = namedtuple("NotFound", "question")
+
+# No answers are marked as solving the question, so it's asked instead
+NoAnswers = namedtuple("NoAnswers", "question")
+
+# The question doesn't declare how to generate inputs of different sizes
+NoScalingInputs = namedtuple("NoScalingInputs", "question")
+
+# Every answer is first tried with only the first call_limit calls of the question. most_rejecting_line is
+# the (line, rejections, average seconds into the question) where most answers have been rejected, or None.
+FastFail = namedtuple("FastFail", "question call_limit most_rejecting_line")
+
+# Answers which were given up on when asking. status is TIMED_OUT, OUT_OF_MEMORY or CRASHED (see _parallel),
+# and limit is the timeout in seconds or the memory limit in megabytes, if any.
+OverBudget = namedtuple("OverBudget", "question status answers limit")
+
+# Asking the question found no correct answers
+NoSolutions = namedtuple("NoSolutions", "question")
+
+# The question can't be asked, for the reason given
+Unanswerable = namedtuple("Unanswerable", "question message")
+
+# Answers which behaved the same on every input they were tried with (see _behavior.equivalence_classes)
+EquivalentAnswers = namedtuple("EquivalentAnswers", "answers")
+
+# The end of the results of a command run by `funcfinder batch`, with its exit status,
+# and a description of what went wrong if it failed
+End = namedtuple("End", "command status error")
+
+
+def to_json(record):
+    return json.dumps(OrderedDict([("type", type(record).__name__)] + record._asdict().items()))
+
+
+class TextPrinter(object):
+    """
+    Prints records as the text shown by the funcfinder commands. Tables are printed once all their rows
+    have arrived, so finish must be called after the last record.
+    """
+
+    def __init__(self):
+        self._last_type = None
+        self._headings = set()
+        self._rows = []
+
+    def print_record(self, record):
+        if type(record) is not self._last_type:
+            self.finish()
+        self._last_type = type(record)
+        getattr(self, "_print_" + type(record).__name__)(record)
+
+    def finish(self):
+        """
+        Prints whatever is still waiting for the rest of a table.
+        """
+        if self._last_type is AnswerTiming:
+            self._print_timing_table()
+        elif self._last_type is ScalingTimes:
+            self._print_scaling_table()
+        elif self._last_type is Crossover:
+            print
+        self._last_type = None
+        self._rows = []
+
+    def _heading(self, heading):
+        if heading not in self._headings:
+            self._headings.add(heading)
+            print heading
+            print
+
+    def _print_QuestionMatch(self, match):
+        print match.name + ":\n"
+        print match.doc
+        print "\n-----------------------\n"
+
+    def _print_Source(self, source):
+        if source.role == ANSWER:
+            self._heading("Answers:")
+        elif source.role == DEPENDENCY:
+            self._heading("Dependencies:")
+        print source.filename, ":", source.line
+        print source.source
+        print
+
+    def _print_AnswerResult(self, result):
+        if result.status == PASSED:
+            print "Passed tests successfully."
+            print "--------------------------"
+            print
+        else:
+            print "Failed tests with exception:"
+            print result.traceback
+
+    def _print_Solution(self, solution):
+        if solution.solves:
+            print "Solves the question%s %s" % ("s" * (len(solution.solves) > 1), ", ".join(solution.solves))
+            print
+        print "-------------------------"
+        print
+
+    def _print_AnswerTiming(self, timing):
+        self._heading("Times per answer:")
+        self._rows.append(timing)
+
+    def _print_timing_table(self):
+        rows = [[timing.answer + "*" * (not timing.precise),
+                 format_seconds(timing.median),
+                 format_seconds(timing.minimum),
+                 format_seconds(timing.stddev),
+                 "%i x %i" % (timing.runs, timing.number),
+                 format_seconds(timing.answer_median),
+                 format_seconds(timing.answer_minimum),
+                 "n/a" if timing.peak_memory is None else format_bytes(timing.peak_memory),
+                 "n/a" if timing.retained_memory is None else format_bytes(timing.retained_memory),
+                 "n/a" if timing.objects is None else str(timing.objects)]
+                for timing in self._rows]
+        print_table(["Answer", "Median", "Min", "Std dev", "Runs x calls", "Answer only", "Min",
+                     "Peak memory", "Retained", "Objects"], rows)
+        print
+        print "Answer only: the time spent inside the answer, replaying the calls the question makes to it."
+        print "Peak memory: how much the process grew while replaying those calls, or n/a if it was too little " \
+              "to measure."
+        print "Retained, Objects: the size and number of the new objects kept alive by the results."
+        if not all(timing.precise for timing in self._rows):
+            print "* Ran out of time before the times were measured to within %g%%." % (self._rows[0].precision * 100)
+        print
+
+    def _print_ScalingTimes(self, times):
+        self._rows.append(times)
+
+    def _print_scaling_table(self):
+        print "Median times per answer by input size:"
+        print
+        rows = [[times.answer] + map(format_seconds, times.times) +
+                ["n/a" if times.growth_exponent is None else "%.2f" % times.growth_exponent]
+                for times in self._rows]
+        print_table(["Answer"] + map(str, self._rows[0].sizes) + ["Growth exponent"], rows)
+        print
+
+    def _print_Crossover(self, crossover):
+        print "%s becomes faster than %s at a size of about %i" % (crossover.faster, crossover.slower, crossover.size)
+
+    def _print_EquivalentAnswers(self, equivalent):
+        self._heading("Answers which behave the same on every input tried:")
+        print ", ".join(equivalent.answers)
+
+    def _print_NotFound(self, not_found):
+        print "No question with name %s found" % not_found.question
+
+    def _print_NoAnswers(self, no_answers):
+        print "No answers have been marked as solving this question, which is a problem."
+        print "The question will now be asked manually. If any solutions are found, please contribute by adding:"
+        print
+        print "@solves(q.%s)" % no_answers.question
+        print
+        print "to each solution."
+        print
+
+    def _print_NoScalingInputs(self, _):
+        print "This question doesn't declare how to generate inputs of different sizes, so scaling can't be measured."
+        print
+
+    def _print_FastFail(self, fast_fail):
+        print "Trying every answer with the first %i call%s of the question before running it in full." % (
+            fast_fail.call_limit, "s" * (fast_fail.call_limit > 1))
+        if fast_fail.most_rejecting_line:
+            print "Line %i rejects the most answers (%i so far, %.3f s into the question on average)." % tuple(
+                fast_fail.most_rejecting_line)
+        print
+
+    def _print_OverBudget(self, over_budget):
+        description = {TIMED_OUT: "Timed out (took more than %s s for a single trial)" % over_budget.limit,
+                       OUT_OF_MEMORY: "Ran out of memory" +
+                                      (" (used more than %s MB)" % over_budget.limit
+                                       if over_budget.limit is not None else ""),
+                       CRASHED: "Crashed the process trying them"}[over_budget.status]
+        print "%s:" % description
+        print ", ".join(over_budget.answers)
+        print
+
+    def _print_NoSolutions(self, _):
+        print "Sorry, no correct answers found. If you find one, please consider contributing it!"
+
+    def _print_Unanswerable(self, unanswerable):
+        print unanswerable.message
+
+
+def source_record(role, func, source):
+    """
+    The Source of a function or code object, given its source as returned by funcfinder._get_source.
+    """
+    return Source(role, getattr(func, "__name__", getattr(func, "co_name", None)),
+                  inspect.getsourcefile(func), inspect.getsourcelines(func)[1], source)
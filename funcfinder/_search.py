@@ -0,0 +1,118 @@
+from collections import defaultdict
+import hashlib
+import json
+import math
+
+from funcfinder._cache import load_json, save_json
+
+_FILENAME = "question-index.json"
+
+# Changes whenever the way the postings are built changes, making the stored ones useless
+_VERSION = 2
+
+# Only n-grams of exactly this size are indexed. Shorter ones appear in nearly every question, so their postings
+# would be huge without narrowing anything down, and shorter terms are simply looked for in every question.
+_GRAM_SIZE = 3
+
+
+def _unicode(text):
+    """
+    Docstrings are unicode once the catalog has been loaded from JSON, but byte strings when they've just been
+    imported, and so are search terms from the command line. Everything is compared as unicode.
+    """
+    if isinstance(text, str):
+        return text.decode("utf-8", "replace")
+    return text
+
+
+class QuestionIndex(object):
+    """
+    An inverted index over the names and docstrings of questions.
+
+    A question matches a search if its name and docstring (concatenated and lowercased) contain every term,
+    exactly like a plain scan with `in`. Candidates for each term are found by intersecting the postings of the
+    term's character n-grams and then confirmed directly, so only a handful of strings are ever scanned.
+    Matches are ranked by BM25 over the number of occurrences of each term.
+    """
+
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, entries, postings=None):
+        """
+        entries is an iterable of (name, docstring) pairs. postings maps each n-gram to the positions of the
+        entries containing it, as built from the same entries before. They're built again if not given.
+        """
+        self.names = []
+        self._texts = []
+        for name, doc in entries:
+            self.names.append(name)
+            self._texts.append(_unicode(name + (doc or "")).lower())
+        if postings is None:
+            postings = defaultdict(list)
+            for doc_id, text in enumerate(self._texts):
+                for gram in set(text[start:start + _GRAM_SIZE] for start in xrange(len(text) - _GRAM_SIZE + 1)):
+                    postings[gram].append(doc_id)
+            # Stored as strings of space separated positions, which are much quicker to load than lists,
+            # and only the postings of the n-grams in a search ever need to be read
+            postings = dict((gram, " ".join(map(str, doc_ids))) for gram, doc_ids in postings.iteritems())
+        self.postings = postings
+        self._average_length = float(sum(map(len, self._texts))) / len(self._texts) if self._texts else 0.0
+
+    def _term_matches(self, term):
+        if len(term) < _GRAM_SIZE:
+            return set(doc_id for doc_id, text in enumerate(self._texts) if term in text)
+        grams = sorted((self.postings.get(term[start:start + _GRAM_SIZE], "")
+                        for start in xrange(len(term) - _GRAM_SIZE + 1)),
+                       key=len)
+        candidates = set(map(int, grams[0].split()))
+        for gram in grams[1:]:
+            candidates.intersection_update(map(int, gram.split()))
+        return set(doc_id for doc_id in candidates if term in self._texts[doc_id])
+
+    def search(self, terms):
+        """
+        Returns the names of the questions containing all the terms, best match first.
+        """
+        terms = [_unicode(term).lower() for term in terms]
+        matches_per_term = []
+        for term in terms:
+            matches = self._term_matches(term)
+            if not matches:
+                return []
+            matches_per_term.append((term, matches))
+
+        if not matches_per_term:
+            return list(self.names)
+
+        found = set.intersection(*(matches for _, matches in matches_per_term))
+        num_docs = len(self.names)
+        scores = dict.fromkeys(found, 0.0)
+        for term, matches in matches_per_term:
+            idf = math.log(1 + (num_docs - len(matches) + 0.5) / (len(matches) + 0.5))
+            for doc_id in found:
+                text = self._texts[doc_id]
+                frequency = text.count(term) if term else 1
+                norm = self.k1 * (1 - self.b + self.b * len(text) / self._average_length)
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        return [self.names[doc_id] for doc_id in sorted(found, key=lambda doc_id: (-scores[doc_id], doc_id))]
+
+
+def _entries_hash(entries):
+    # The same whether the docstrings came from the modules or the stored catalog (as unicode)
+    return hashlib.sha1(json.dumps(entries)).hexdigest()
+
+
+def load_question_index(entries):
+    """
+    The QuestionIndex of entries, a list of (name, docstring) pairs, using the postings stored in the cache directory
+    if they were built from the same entries, and storing them otherwise.
+    """
+    entries_hash = _entries_hash(entries)
+    stored = load_json(_FILENAME, {})
+    if stored.get("version") == _VERSION and stored.get("hash") == entries_hash:
+        return QuestionIndex(entries, stored["postings"])
+    index = QuestionIndex(entries)
+    save_json(_FILENAME, dict(version=_VERSION, hash=entries_hash, postings=index.postings))
+    return index
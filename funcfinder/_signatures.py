@@ -0,0 +1,172 @@
+import time
+
+from funcfinder._cache import load_json, save_json
+from funcfinder._catalog import get_answer_catalog
+from funcfinder._rejections import question_key
+
+_FILENAME = "argument-types.json"
+
+_argument_types = None
+
+# Failed permutations are tried again after this many seconds, in case the failure was down to chance
+# (e.g. a question with random inputs) or something outside the answer
+_FAILURE_LIFETIME = 7 * 24 * 60 * 60
+
+
+def _type_name(value):
+    """
+    The name of the type of value, including the type of the first element of common containers
+    (e.g. 'list[int]') since crashing on a list of strings says little about a list of numbers.
+    """
+    name = type(value).__name__
+    if isinstance(value, (list, tuple, set, frozenset, dict)):
+        element_name = next((type(element).__name__ for element in value), "")
+        name = "%s[%s]" % (name, element_name)
+    return name
+
+
+def type_signature(args):
+    return tuple(_type_name(arg) for arg in args)
+
+
+def permute(it, index_permutation):
+    """
+    The elements of it rearranged so that the i-th one is it[index_permutation[i]], as a tuple.
+    """
+    return tuple(it[i] for i in index_permutation)
+
+
+class AnswerTypes(object):
+    """
+    The type signatures of arguments that a single answer has accepted, and those that it crashed on
+    (by raising a TypeError or AttributeError) while trying one question.
+
+    From these it also infers which types each argument position can't handle: if the answer crashed on a signature
+    where every position but one has a type that was accepted in that position before, the remaining position
+    must be the problem. Any signature with that type in that position is then ruled out.
+
+    A crash may be caused by the values of the arguments rather than their types, so crashes seen in other
+    questions (rejected_elsewhere) never rule anything out. They only make those signatures be tried last.
+
+    failed maps the permutations of the question's arguments (see permute) that have failed the question to the
+    time they failed, so that they aren't tried again for a while.
+    """
+
+    def __init__(self, accepted=(), rejected=(), rejected_elsewhere=(), failed=None):
+        self.accepted = set(map(tuple, accepted))
+        self.rejected = set(map(tuple, rejected))
+        self.rejected_elsewhere = set(map(tuple, rejected_elsewhere))
+        self.failed = failed or {}
+        self._incompatible = None
+
+    def observe(self, observed_types):
+        """
+        observed_types maps type signatures to whether the answer accepted them.
+        """
+        for signature, accepted in observed_types.iteritems():
+            if accepted:
+                self.accepted.add(signature)
+                self.rejected.discard(signature)
+            elif signature not in self.accepted:
+                self.rejected.add(signature)
+        self._incompatible = None
+
+    def _incompatible_positions(self):
+        if self._incompatible is None:
+            accepted_per_position = {}
+            for signature in self.accepted:
+                for position, type_name in enumerate(signature):
+                    accepted_per_position.setdefault(position, set()).add(type_name)
+            self._incompatible = set()
+            for signature in self.rejected:
+                unknown = [(position, type_name) for position, type_name in enumerate(signature)
+                           if type_name not in accepted_per_position.get(position, ())]
+                if len(unknown) == 1:
+                    self._incompatible.add(unknown[0])
+        return self._incompatible
+
+    def may_accept(self, signature):
+        signature = tuple(signature)
+        if signature in self.accepted:
+            return True
+        if signature in self.rejected:
+            return False
+        incompatible = self._incompatible_positions()
+        return not any(position_type in incompatible for position_type in enumerate(signature))
+
+    def order(self, signature):
+        """
+        A sort key which puts signatures the answer has accepted first and those it crashed on elsewhere last.
+        """
+        signature = tuple(signature)
+        if signature in self.accepted:
+            return 0
+        if signature in self.rejected_elsewhere:
+            return 2
+        return 1
+
+
+class ArgumentTypes(object):
+    """
+    Remembers the AnswerTypes of every answer in the cache directory. Accepted signatures are shared across
+    questions, and rejected signatures and failed permutations are stored per question
+    (see _rejections.question_key).
+    What's known about an answer is forgotten when its source changes, and failed permutations are also
+    forgotten after _FAILURE_LIFETIME.
+    """
+
+    def __init__(self):
+        self._records = load_json(_FILENAME, {})
+        self._changed = False
+
+    def _record(self, answer_name):
+        answer_hash = get_answer_catalog()[answer_name]["hash"]
+        record = self._records.get(answer_name)
+        # Older records kept the rejections of all questions in one list, or failed permutations without times
+        if record is None or record["hash"] != answer_hash or "failures" not in record:
+            record = self._records[answer_name] = dict(hash=answer_hash, accepted=[], rejected={}, failures={})
+        return record
+
+    def for_answer(self, answer_name, question):
+        if answer_name not in get_answer_catalog():
+            return AnswerTypes()
+        record = self._record(answer_name)
+        key = question_key(question)
+        rejected_elsewhere = [signature for other_key, rejected in record["rejected"].iteritems()
+                              if other_key != key for signature in rejected]
+        now = time.time()
+        failed = dict((tuple(index_permutation), failed_at)
+                      for index_permutation, failed_at in record["failures"].get(key, [])
+                      if now - failed_at < _FAILURE_LIFETIME)
+        return AnswerTypes(record["accepted"], record["rejected"].get(key, []), rejected_elsewhere, failed)
+
+    def update(self, answer_name, question, answer_types):
+        if answer_name not in get_answer_catalog():
+            return
+        record = self._record(answer_name)
+        key = question_key(question)
+        accepted = sorted(map(list, answer_types.accepted))
+        if accepted != sorted(record["accepted"]):
+            record["accepted"] = accepted
+            self._changed = True
+        for field, known in (("rejected", sorted(map(list, answer_types.rejected))),
+                             ("failures", sorted([list(index_permutation), failed_at]
+                                                 for index_permutation, failed_at in answer_types.failed.iteritems()))):
+            if known != sorted(record[field].get(key, [])):
+                if known:
+                    record[field][key] = known
+                else:
+                    record[field].pop(key, None)
+                self._changed = True
+
+    def save(self):
+        if self._changed:
+            save_json(_FILENAME, self._records)
+            self._changed = False
+
+
+def get_argument_types():
+    global _argument_types
+    if _argument_types is None:
+        _argument_types = ArgumentTypes()
+    return _argument_types
@@ -0,0 +1,205 @@
+import collections
+import copy
+from collections import namedtuple, OrderedDict
+import math
+import timeit
+
+# Two-sided 95% quantiles of Student's t distribution by degrees of freedom
+_T_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+         2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+         2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+# The number of calls in each timed run is chosen so that a run takes at least this long,
+# making the timer's resolution and the overhead of timeit negligible
+_MIN_RUN_TIME = 0.02
+
+_MIN_RUNS = 5
+
+# An answer only counts as overtaking another where it's faster by more than this fraction, so that noise in the
+# times of answers which are about as fast as each other doesn't produce crossovers back and forth.
+# Dispatch tables (see _dispatch) only switch answers at such crossovers too.
+_CROSSOVER_MARGIN = 0.05
+
+# Statistics of the time taken by a single call in seconds, measured over some runs of number calls each.
+# precise is False if the time budget ran out before the requested precision was reached.
+Timing = namedtuple("Timing", "median minimum stddev runs number precise")
+
+
+def _t_95(degrees_of_freedom):
+    if degrees_of_freedom <= len(_T_95):
+        return _T_95[degrees_of_freedom - 1]
+    return 1.96
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
+
+
+def benchmark(stmt, budget, precision):
+    """
+    Times stmt, a function without arguments. The number of calls per run is first calibrated,
+    then runs are repeated until the 95% confidence interval for the mean time is within precision
+    (relative to the mean) on either side, or until about budget seconds have been spent in total.
+    """
+    timer = timeit.default_timer
+    start = timer()
+
+    number = 1
+    while True:
+        run_time = timeit.timeit(stmt, number=number)
+        if run_time >= _MIN_RUN_TIME or timer() - start > budget:
+            break
+        number *= max(2, min(10, int(_MIN_RUN_TIME / max(run_time, 1e-9))))
+
+    samples = [run_time / number]
+    while True:
+        samples.append(timeit.timeit(stmt, number=number) / number)
+        runs = len(samples)
+        mean = sum(samples) / runs
+        stddev = math.sqrt(sum((sample - mean) ** 2 for sample in samples) / (runs - 1))
+        precise = _t_95(runs - 1) * stddev / math.sqrt(runs) <= precision * mean
+        if runs >= _MIN_RUNS and precise or timer() - start > budget:
+            break
+
+    return Timing(_median(samples), min(samples), stddev, runs, number, precise)
+
+
+def format_seconds(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e3), ("us", 1e6)):
+        if seconds * scale >= 1:
+            return "%.3g %s" % (seconds * scale, unit)
+    return "%.3g ns" % (seconds * 1e9)
+
+
+def print_table(header, rows):
+    """
+    Prints rows of strings as columns aligned under the header.
+    """
+    rows = [header] + rows
+    widths = [max(len(row[column]) for row in rows) for column in xrange(len(header))]
+    for row in rows:
+        print "  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+
+
+def consume(result):
+    """
+    Exhausts result if it's an iterator, so that lazy answers are timed doing the actual work.
+    """
+    if isinstance(result, collections.Iterator):
+        collections.deque(result, maxlen=0)
+
+
+def record_calls(question, answer):
+    """
+    Runs question(answer) and returns a record of the arguments of every call to answer, to pass to replay_calls.
+    Arguments are copied as they were at the time of the call, since questions often go on to modify them,
+    and iterators are stored as lists so that they can be replayed any number of times.
+    """
+    calls = []
+
+    def recorder(*args):
+        iterator_positions = [i for i, arg in enumerate(args) if isinstance(arg, collections.Iterator)]
+        args = list(args)
+        for i in iterator_positions:
+            args[i] = list(args[i])
+        try:
+            recorded_args = copy.deepcopy(tuple(args))
+        except Exception:
+            recorded_args = tuple(args)
+        calls.append((recorded_args, iterator_positions))
+        for i in iterator_positions:
+            args[i] = iter(args[i])
+        return answer(*args)
+
+    question(recorder)
+    return calls
+
+
+def replay_calls(answer, calls, keep_results=False):
+    """
+    Calls answer with each set of arguments recorded by record_calls and consumes the results.
+    If keep_results is true, returns a list of the (consumed) results.
+    """
+    results = []
+    for args, iterator_positions in calls:
+        if iterator_positions:
+            args = list(args)
+            for i in iterator_positions:
+                args[i] = iter(args[i])
+        result = answer(*args)
+        consume(result)
+        if keep_results:
+            results.append(result)
+    return results
+
+
+def scaling_sizes(max_size, factor=4):
+    """
+    A geometric range of sizes from 1 up to max_size (inclusive).
+    """
+    sizes = [1]
+    while sizes[-1] * factor < max_size:
+        sizes.append(sizes[-1] * factor)
+    sizes.append(max_size)
+    return sizes
+
+
+def time_scaling(question, answers, budget, precision):
+    """
+    Times each of the answers on the inputs of each size generated by the question's scaling_inputs,
+    spending about budget seconds in total. Returns the sizes and an OrderedDict mapping the name of each answer
+    to its median times at those sizes.
+    """
+    sizes = scaling_sizes(question.scaling_max_size)
+    budget /= len(sizes) * len(answers)
+    times_by_name = OrderedDict((answer.__name__, []) for answer in answers)
+    for size in sizes:
+        args = question.scaling_inputs(size)
+        for answer in answers:
+            timing = benchmark(lambda: consume(answer(*args)), budget, precision)
+            times_by_name[answer.__name__].append(timing.median)
+    return sizes, times_by_name
+
+
+def growth_exponent(sizes, times):
+    """
+    The slope of the least squares line through log(time) against log(size), e.g. about 1 for linear time
+    and 2 for quadratic, estimated from the sizes above 1 where constant overheads matter less.
+    """
+    points = [(math.log(size), math.log(time)) for size, time in zip(sizes, times) if size > 1 and time > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    return (sum((x - mean_x) * (y - mean_y) for x, y in points) /
+            sum((x - mean_x) ** 2 for x, _ in points))
+
+
+def crossovers(sizes, times_by_name):
+    """
+    Yields (faster, slower, size) for each point where the answer named faster overtakes the answer named slower,
+    estimated by interpolating the log of the ratio of their times between the measured sizes.
+    Sizes where neither answer is faster than the other by more than _CROSSOVER_MARGIN are ignored, so a crossover
+    is between the last size where one was clearly faster and the next size where the other one is.
+    """
+    threshold = math.log(1 + _CROSSOVER_MARGIN)
+    names = list(times_by_name)
+    for i, name1 in enumerate(names):
+        for name2 in names[i + 1:]:
+            log_ratios = [math.log(time1 / time2)
+                          for time1, time2 in zip(times_by_name[name1], times_by_name[name2])]
+            last = None
+            for j, after in enumerate(log_ratios):
+                if abs(after) <= threshold:
+                    continue
+                if last is not None and log_ratios[last] * after < 0:
+                    before = log_ratios[last]
+                    log_size = (math.log(sizes[last]) +
+                                (math.log(sizes[j]) - math.log(sizes[last])) * before / (before - after))
+                    faster, slower = (name1, name2) if after < 0 else (name2, name1)
+                    yield faster, slower, int(round(math.exp(log_size)))
+                last = j
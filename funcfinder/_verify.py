@@ -0,0 +1,214 @@
+"""
+Checks that the answers in the repository solve the questions they claim to, by running every
+(question, answer) pair recorded by `solves` in sandboxed worker processes.
+
+Results are stored in the cache directory along with a hash combining the sources of the question, the answer,
+every other question and answer that was called while checking them, and funcfinder.utils.
+A pair only needs to be checked again when that hash changes.
+"""
+
+from collections import namedtuple
+import hashlib
+import inspect
+import traceback
+
+import funcfinder.answers
+import funcfinder.questions
+import funcfinder.utils
+from funcfinder._cache import load_json, save_json
+from funcfinder._catalog import get_answer_catalog, get_question_catalog
+from funcfinder._dependencies import CodeDetector
+from funcfinder._parallel import sandboxed_map, DONE
+from funcfinder.utils import TryImportError
+
+_FILENAME = "verifications.json"
+
+_utils_hash = None
+
+_store = None
+
+PASSED = "passed"
+FAILED = "failed"
+# The answer needs a library that isn't installed
+SKIPPED = "skipped"
+
+# status is one of the above or a status from _parallel other than DONE, e.g. TIMED_OUT.
+# message describes the exception for FAILED and SKIPPED, otherwise it's None.
+Verification = namedtuple("Verification", "question answer status message")
+
+
+def solves_pairs():
+    """
+    The (question name, answer name) pairs of every `solves` claim in the repository, in catalog order.
+    """
+    return [(question_name, answer_name)
+            for answer_name, entry in get_answer_catalog().iteritems()
+            for question_name in entry["solves"]]
+
+
+def _import_pairs(pairs):
+    for question_name, answer_name in pairs:
+        _ = funcfinder.questions.functions[question_name], funcfinder.answers.functions[answer_name]
+
+
+def dependency_names(question, answer):
+    """
+    The other questions and answers that question(answer) called, as names like 'questions:copy_dict'.
+    """
+    return sorted("%s:%s" % ("questions" if "funcfinder/questions/" in code.co_filename else "answers", code.co_name)
+                  for code in CodeDetector.detect(question, answer, include_questions=True))
+
+
+def _check_pair(pair):
+    question_name, answer_name = pair
+    question = funcfinder.questions.functions[question_name]
+    answer = funcfinder.answers.functions[answer_name]
+    try:
+        CodeDetector.run(question, answer)
+    except TryImportError as e:
+        result = SKIPPED, str(e)
+    except Exception as e:
+        result = FAILED, "".join(traceback.format_exception_only(type(e), e)).strip()
+    else:
+        result = PASSED, None
+    return result + (dependency_names(question, answer),)
+
+
+def _get_utils_hash():
+    global _utils_hash
+    if _utils_hash is None:
+        _utils_hash = hashlib.sha1(inspect.getsource(funcfinder.utils)).hexdigest()
+    return _utils_hash
+
+
+def combined_hash(question_name, answer_name, dependencies):
+    """
+    Hashes the sources of the question, the answer, the dependencies (as returned by dependency_names)
+    and funcfinder.utils together. A dependency that no longer exists still changes the hash.
+    """
+    catalogs = dict(questions=get_question_catalog(), answers=get_answer_catalog())
+    parts = ["utils:" + _get_utils_hash()]
+    for name in ["questions:" + question_name, "answers:" + answer_name] + sorted(dependencies):
+        package, function_name = name.split(":", 1)
+        entry = catalogs[package].get(function_name)
+        parts.append("%s:%s" % (name, entry and entry["hash"]))
+    return hashlib.sha1("\n".join(parts)).hexdigest()
+
+
+class VerificationStore(object):
+    """
+    The last result of checking each pair, stored in the cache directory. Only passes and failures are kept,
+    since timeouts, crashes and missing libraries depend on the circumstances rather than on the sources.
+    `funcfinder show` also keeps the full failure message and the timings of the answers here.
+    Pairs where the question or the answer isn't in the repository aren't stored.
+    """
+
+    def __init__(self):
+        self._records = load_json(_FILENAME, {})
+        self._changed = False
+
+    @staticmethod
+    def _key(question_name, answer_name):
+        return "%s <- %s" % (question_name, answer_name)
+
+    @staticmethod
+    def _in_repository(question_name, answer_name):
+        return question_name in get_question_catalog() and answer_name in get_answer_catalog()
+
+    def record(self, question_name, answer_name):
+        """
+        Returns the stored dict for the pair, with the keys status, message and dependencies, and possibly
+        traceback and timing, or None if there isn't one or something has changed since.
+        """
+        if not self._in_repository(question_name, answer_name):
+            return None
+        record = self._records.get(self._key(question_name, answer_name))
+        if record is None or record["hash"] != combined_hash(question_name, answer_name, record["dependencies"]):
+            return None
+        return record
+
+    def lookup(self, question_name, answer_name):
+        """
+        Returns the stored Verification of the pair, or None if there isn't one or something has changed since.
+        """
+        record = self.record(question_name, answer_name)
+        if record is None:
+            return None
+        return Verification(question_name, answer_name, record["status"], record["message"])
+
+    def update(self, verification, dependencies, traceback_text=None):
+        """
+        Stores the result of checking a pair. Timings (and the traceback, if none is given) are kept
+        if the result and the sources are the same as before.
+        """
+        if not self._in_repository(verification.question, verification.answer):
+            return
+        key = self._key(verification.question, verification.answer)
+        if verification.status in (PASSED, FAILED):
+            record = dict(
+                hash=combined_hash(verification.question, verification.answer, dependencies),
+                dependencies=dependencies,
+                status=verification.status,
+                message=verification.message)
+            previous = self._records.get(key)
+            if previous and (previous["hash"], previous["status"]) == (record["hash"], record["status"]):
+                for name in "traceback", "timing":
+                    if name in previous:
+                        record[name] = previous[name]
+            if traceback_text is not None:
+                record["traceback"] = traceback_text
+            self._records[key] = record
+        else:
+            self._records.pop(key, None)
+        self._changed = True
+
+    def update_timing(self, question_name, answer_name, timing):
+        record = self.record(question_name, answer_name)
+        if record is not None:
+            record["timing"] = timing
+            self._changed = True
+
+    def save(self):
+        if self._changed:
+            save_json(_FILENAME, self._records)
+            self._changed = False
+
+
+def get_verification_store():
+    global _store
+    if _store is None:
+        _store = VerificationStore()
+    return _store
+
+
+def verify_pairs(pairs, processes=None, timeout=None, full=False):
+    """
+    Yields a (Verification, whether it's a stored result) pair for each (question name, answer name) pair, in order.
+    Pairs are only checked if nothing they depend on has changed since they were last checked, unless full is true.
+    Checks are done in parallel (see sandboxed_map for processes), and answers taking longer than timeout seconds
+    are given up on.
+    """
+    store = get_verification_store()
+    stored = {} if full else dict((pair, store.lookup(*pair)) for pair in pairs)
+    to_check = [pair for pair in pairs if stored.get(pair) is None]
+
+    # Import everything once before the workers are forked, rather than once in every worker
+    _import_pairs(to_check)
+    results = sandboxed_map(_check_pair, to_check, processes=processes, timeout=timeout)
+    try:
+        for pair in pairs:
+            if stored.get(pair) is not None:
+                yield stored[pair], True
+                continue
+            status, result = next(results)
+            dependencies = []
+            if status == DONE:
+                status, message, dependencies = result
+            else:
+                message = None
+            verification = Verification(pair[0], pair[1], status, message)
+            store.update(verification, dependencies)
+            yield verification, False
+    finally:
+        results.close()
+        store.save()
@@ -1,3 +1,3 @@
 # noinspection PyProtectedMember
-from funcfinder._imports import get_functions
-functions = get_functions(__path__, __name__)
+from funcfinder._catalog import LazyFunctions
+functions = LazyFunctions(__path__, __name__)
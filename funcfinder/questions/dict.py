@@ -6,6 +6,7 @@ import itertools
 from funcfinder.utils import *
 
 
+@scaling(lambda size: (range(size), lambda x: x % 10))
 def group_by_key_func(func):
     """
     Create a dictionary from an iterable such that the keys are the result of evaluating a key function on elements
@@ -21,6 +22,7 @@ def group_by_key_func(func):
                  1: [-1, 1, 3, 9]})
 
 
+@scaling(lambda size: (dict.fromkeys(xrange(size), 0),))
 def copy_dict(func):
     """
     Returns a new separate dict equal to the original. Updates to the copy don't affect the original.
@@ -50,6 +52,7 @@ def copy_dict(func):
     assertIsNone(original.get('x'))
 
 
+@scaling(lambda size: (dict(zip(random.sample(xrange(size), size), xrange(size))),))
 def sort_dict_by_key(func):
     """
     Return a copy of a dict which still supports all the standard operations with the usual API,
@@ -75,6 +78,7 @@ def sort_dict_by_key(func):
         assertEqualIters(sorted_keys, sorted_dict.iterkeys())
 
 
+@scaling(lambda size: (dict(zip(random.sample(xrange(size), size), xrange(size))),))
 def always_sorted_dict_by_key(func):
     """
     Return a copied dict sorted by key which preserves its order upon updates.
@@ -88,6 +92,7 @@ def always_sorted_dict_by_key(func):
         assertEqualIters(sorted(sorted_dict.keys()), sorted_dict.iterkeys())
 
 
+@scaling(lambda size: (dict(zip(xrange(size), random.sample(xrange(size), size))),))
 def sort_dict_by_value(func):
     """
     Return a copy of a dict which still supports all the standard operations with the usual API,
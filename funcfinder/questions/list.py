@@ -4,6 +4,7 @@ import string
 import random
 
 
+@scaling(lambda size: ([range(size) for _ in xrange(size)],), max_size=1000)
 def transpose(func):
     """
     Swap/exchange/invert the rows and columns in a list of lists/tuples
@@ -41,6 +42,7 @@ def transpose(func):
                          [[i] * 200 for i in xrange(100)])
 
 
+@scaling(lambda size: ([range(size) for _ in xrange(size)],), max_size=1000)
 def transpose_without_tuples(func):
     """
     Like transpose, but the result consists of lists again, not tuples, i.e. not
@@ -51,6 +53,7 @@ def transpose_without_tuples(func):
                 [[1, 3], [2, 4]])
 
 
+@scaling(lambda size: ([range(10) for _ in xrange(size)],))
 def flatten_2d_list_to_iterable(func):
     """
     Flatten (merge) a list of lists (nested list) into a single iterable, not necessarily a concrete list.
@@ -79,6 +82,7 @@ def flatten_2d_list_to_iterable(func):
     assertEqualIters(func(before), xrange(count))
 
 
+@scaling(lambda size: ([range(10) for _ in xrange(size)],))
 def flatten_2d_list_to_list(func):
     """
     Flatten a 2D list into an actual list, not just any iterable.
@@ -87,6 +91,7 @@ def flatten_2d_list_to_list(func):
     assertEqual(func([[1, 2], [3, 4]]), [1, 2, 3, 4])
 
 
+@scaling(lambda size: (range(size), range(0, size, 2)), max_size=1000)
 def contains_all(func):
     """
     Return whether the first argument (string, list, tuple, set, or anything else with a __contains__ method)
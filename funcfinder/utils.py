@@ -1,4 +1,4 @@
-from itertools import izip_longest
+from itertools import islice, izip_longest
 import importlib
 
 
@@ -16,6 +16,21 @@ def solves(*questions):
     return real_decorator
 
 
+def scaling(inputs, max_size=10000):
+    """
+    Declares how to generate arguments of a given size for answers to this question, so that answers can be timed
+    across a range of sizes up to max_size (using `funcfinder show --scaling`).
+    inputs takes a positive integer size and returns a tuple of arguments to pass to an answer.
+    """
+
+    def real_decorator(question):
+        question.scaling_inputs = inputs
+        question.scaling_max_size = max_size
+        return question
+
+    return real_decorator
+
+
 def ask_ignore(answer):
     answer.ask_ignore = True
     return answer
@@ -97,6 +112,52 @@ def assertNotAlmostEqual(a, b):
     assert round(a - b, 7) != 0
 
 
+class _Missing(object):
+    """
+    Fills in for the elements of the shorter iterable when comparing iterables of different lengths.
+    """
+
+    def __repr__(self):
+        return "<missing>"
+
+
+_MISSING = _Missing()
+
+# Types whose instances are compared with == without checking whether they're iterable
+_SCALAR_TYPES = frozenset([int, long, float, bool, complex, type(None)])
+
+_SEQUENCE_TYPES = (list, tuple)
+
+# The number of elements of each iterable read at a time by assertEqualIters
+_CHUNK_SIZE = 1000
+
+
+def _format_path(path):
+    return "".join("[%i]" % index for index in path)
+
+
+def _first_difference(a, b):
+    """
+    Returns (index, element of a, element of b) for the first position where a and b differ, or None.
+    Iterables are read in chunks which are compared as lists, so the elements are compared in C
+    rather than in a Python loop, and only the chunk that differs is looked at element by element.
+    """
+    if isinstance(a, _SEQUENCE_TYPES) and isinstance(b, _SEQUENCE_TYPES):
+        chunks = [(list(a), list(b))]
+    else:
+        iter_a, iter_b = iter(a), iter(b)
+        chunks = iter(lambda: (list(islice(iter_a, _CHUNK_SIZE)), list(islice(iter_b, _CHUNK_SIZE))), ([], []))
+
+    offset = 0
+    for chunk_a, chunk_b in chunks:
+        if not chunk_a == chunk_b:
+            for index, (i1, i2) in enumerate(izip_longest(chunk_a, chunk_b, fillvalue=_MISSING)):
+                if not i1 == i2:
+                    return offset + index, i1, i2
+        offset += len(chunk_a)
+    return None
+
+
 def assertEqualIters(a, b):
     """
     Assert that two iterables have equal elements in order, whether they are lists, tuples, strings, iterators, etc.
@@ -107,7 +168,9 @@ def assertEqualIters(a, b):
     will pass.
     This is a shallow comparison: for nested iterables use assertDeepEqualIters.
     """
-    assert all(i1 == i2 for i1, i2 in izip_longest(a, b, fillvalue=object()))
+    difference = _first_difference(a, b)
+    if difference is not None:
+        raise AssertionError("First difference at [%i]: %r != %r" % difference)
 
 
 def assertDeepEqualIters(a, b):
@@ -119,20 +182,53 @@ def assertDeepEqualIters(a, b):
     is not equal to
     ["ab", ["c", "d"], ("e", "f"), (c for c in "gh"), 1, [[[2]]]]
     not even according to assertEqualIters, but according to this function they are.
+    Lists and tuples whose elements are all equal according to == are not looked into any further.
     """
-    try:
-        iter(a)
-    except TypeError:
-        assert a == b
-    else:
-
-        # Avoid infinite recursion for single character strings
-        if isinstance(a, basestring) and len(a) == 1:
-            assert a == b
-            return
-
-        for i1, i2 in izip_longest(a, b, fillvalue=object()):
-            assertDeepEqualIters(i1, i2)
+    # The pairs of elements (with their indices) still to be compared at each level of nesting,
+    # and the index of the pair being compared at each level above the current one.
+    # This avoids recursion, so deep structures don't hit the recursion limit.
+    stack = [enumerate([(a, b)])]
+    path = []
+    scalar_types, sequence_types, missing = _SCALAR_TYPES, _SEQUENCE_TYPES, _MISSING
+    while stack:
+        for index, (i1, i2) in stack[-1]:
+            if type(i1) in scalar_types or i1 is missing:
+                equal = i1 == i2
+            elif isinstance(i1, basestring):
+                if isinstance(i2, basestring) or len(i1) == 1:
+                    # Comparing two strings character by character is the same as comparing them whole
+                    equal = i1 == i2
+                else:
+                    nested_pairs = izip_longest(i1, i2, fillvalue=missing)
+                    break
+            elif (type(i1) is type(i2) and type(i1) in sequence_types and i1 == i2 or
+                  isinstance(i1, sequence_types) and isinstance(i2, sequence_types) and
+                  len(i1) == len(i2) and list(i1) == list(i2)):
+                equal = True
+            else:
+                try:
+                    nested_pairs = izip_longest(i1, i2, fillvalue=missing)
+                except TypeError:
+                    try:
+                        iter(i1)
+                    except TypeError:
+                        equal = i1 == i2
+                    else:
+                        raise
+                else:
+                    break
+
+            if not equal:
+                raise AssertionError("First difference at %s: %r != %r" %
+                                     (_format_path((path + [index])[1:]) or "the top level", i1, i2))
+        else:
+            stack.pop()
+            if path:
+                path.pop()
+            continue
+
+        stack.append(enumerate(nested_pairs))
+        path.append(index)
 
 
 def assertRaises(callableObj=None, *args):
@@ -161,4 +257,5 @@ class _AssertRaisesContext(object):
     # noinspection PyUnusedLocal
     def __exit__(self, exc_type, _exc_value, _tb):
         assert exc_type is not None
-        return True
+        # Let through whatever isn't an error, such as KeyboardInterrupt or funcfinder stopping the question
+        return issubclass(exc_type, Exception)